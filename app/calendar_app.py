@@ -8,8 +8,6 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt
 
-from style import light_mode
-
 DATA_DIR = "calendar_data"
 os.makedirs(DATA_DIR, exist_ok=True)
 
@@ -46,7 +44,6 @@ class CalendarApp(QWidget):
         self.current_date = date.today()
 
         self.setup_ui()
-        self.setStyleSheet(self.light_mode_style())
         self.load_events()
 
     def setup_ui(self):
@@ -73,7 +70,7 @@ class CalendarApp(QWidget):
 
         right_panel = QVBoxLayout()
         self.title = QLabel(f"Events on {self.current_date.strftime('%B %d, %Y')}")
-        self.title.setStyleSheet("font-size: 18px; font-weight: bold;")
+        self.title.setObjectName("pageTitle")
         right_panel.addWidget(self.title)
         right_panel.addWidget(self.event_list)
         right_panel.addLayout(btn_bar)
@@ -133,6 +130,3 @@ class CalendarApp(QWidget):
             idx = self.event_list.row(item)
             self.manager.delete_event(self.current_date, idx)
             self.load_events()
-
-    def light_mode_style(self):
-        return light_mode(self)
\ No newline at end of file
@@ -1,211 +1,83 @@
 # chat_app.py
 import sys
-import json
 import os
 from datetime import datetime
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QTextEdit, QPushButton,
     QFileDialog, QVBoxLayout, QWidget, QLabel, QHBoxLayout,
-    QListWidget, QListWidgetItem, QSizePolicy, QSplitter,
+    QListView, QAbstractItemView, QSplitter,
     QTreeWidget, QTreeWidgetItem, QMessageBox, QInputDialog,
-    QMenu, QHeaderView
+    QMenu, QHeaderView, QLineEdit
 )
-from PySide6.QtCore import Qt, QEvent, QThread, Signal, QSize
-from PySide6.QtGui import QIcon, QPainter, QColor, QFontMetrics, QAction
-from chat_handler import get_llm_response
-from file_parser import parse_file
+from PySide6.QtCore import Qt, QEvent, QObject, QPersistentModelIndex, Signal, QTimer
+from PySide6.QtGui import QAction
+from myiq.assistant import prepare_messages
+from myiq.chat_handler import warm_up
+from myiq.prompt_builder import PromptBuilder
+from myiq.scheduler import BACKGROUND, Cancelled, get_scheduler
+from myiq.sessions import ChatSession, ChatHistoryManager
+from parse_worker import AttachmentParser
 from voice_trigger import start_voice_listener
+from chat_transcript import ChatMessageModel, ChatBubbleDelegate, TranscriptView
+from resources import icon
 
-from style import light_mode
-
-
-class ChatSession:
-    def __init__(self, session_id=None, title="New Chat"):
-        self.session_id = session_id or datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.title = title
-        self.messages = []
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
-
-    def add_message(self, text, is_user=False, attachments=None):
-        message = {
-            'text': text,
-            'is_user': is_user,
-            'timestamp': datetime.now().isoformat(),
-            'attachments': attachments or []
-        }
-        self.messages.append(message)
-        self.updated_at = datetime.now()
-
-    def to_dict(self):
-        return {
-            'session_id': self.session_id,
-            'title': self.title,
-            'messages': self.messages,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        }
-
-    @classmethod
-    def from_dict(cls, data):
-        session = cls(data['session_id'], data['title'])
-        session.messages = data['messages']
-        session.created_at = datetime.fromisoformat(data['created_at'])
-        session.updated_at = datetime.fromisoformat(data['updated_at'])
-        return session
-
-
-class ChatHistoryManager:
-    def __init__(self, data_dir="chat_history"):
-        self.data_dir = data_dir
-        os.makedirs(data_dir, exist_ok=True)
-        self.sessions_file = os.path.join(data_dir, "sessions.json")
-
-    def save_session(self, session):
-        sessions = self.load_all_sessions()
-        sessions[session.session_id] = session.to_dict()
-        
-        with open(self.sessions_file, 'w', encoding='utf-8') as f:
-            json.dump(sessions, f, ensure_ascii=False, indent=2)
-
-    def load_session(self, session_id):
-        sessions = self.load_all_sessions()
-        if session_id in sessions:
-            return ChatSession.from_dict(sessions[session_id])
-        return None
-
-    def load_all_sessions(self):
-        if os.path.exists(self.sessions_file):
-            try:
-                with open(self.sessions_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return {}
-        return {}
-
-    def delete_session(self, session_id):
-        sessions = self.load_all_sessions()
-        if session_id in sessions:
-            del sessions[session_id]
-            with open(self.sessions_file, 'w', encoding='utf-8') as f:
-                json.dump(sessions, f, ensure_ascii=False, indent=2)
-
-    def get_session_list(self):
-        sessions = self.load_all_sessions()
-        session_list = []
-        for session_data in sessions.values():
-            session_list.append({
-                'id': session_data['session_id'],
-                'title': session_data['title'],
-                'updated_at': session_data['updated_at']
-            })
-        # Sort by updated_at descending
-        session_list.sort(key=lambda x: x['updated_at'], reverse=True)
-        return session_list
-
-
-class ChatBubble(QWidget):
-    def __init__(self, text, is_user=False):
-        super().__init__()
-        self.text = text
-        self.is_user = is_user
-        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-        self.margin = 15
-        self.padding = 10
-        self.max_width = 400
-        self.setMinimumHeight(20)
-        self.setContentsMargins(0, 0, 0, 0)
-
-        fm = QFontMetrics(self.font())
-        rect = fm.boundingRect(0, 0, self.max_width, 1000, Qt.TextWordWrap, self.text)
-        self.text_rect = rect.adjusted(-self.padding, -self.padding, self.padding, self.padding)
-        self.setMinimumHeight(self.text_rect.height() + self.margin)
-
-    def sizeHint(self):
-        return QSize(self.text_rect.width() + self.margin * 2, self.text_rect.height() + self.margin * 2)
-
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-
-        rect = self.rect().adjusted(self.margin, self.margin, -self.margin, -self.margin)
-
-        bubble_color = QColor("#E6F0FF") if self.is_user else QColor("#FFFFFF")
-        border_color = QColor("#105384") if self.is_user else QColor("#DADCE0")
-
-        if self.is_user:
-            rect.moveLeft(self.width() - rect.width() - self.margin)
-
-        painter.setBrush(bubble_color)
-        painter.setPen(border_color)
-        painter.drawRoundedRect(rect, 10, 10)
-
-        text_rect = rect.adjusted(self.padding, self.padding, -self.padding, -self.padding)
-        painter.setPen(QColor("#202123"))
-        painter.drawText(text_rect, Qt.TextWordWrap, self.text)
-
-
-class ChatItemWidget(QWidget):
-    def __init__(self, text, is_user=False):
-        super().__init__()
-        self.is_user = is_user
-
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(10, 5, 10, 5)
-        layout.setSpacing(2)
-
-        header = QWidget()
-        header_layout = QHBoxLayout(header)
-        header_layout.setContentsMargins(0, 0, 0, 0)
-        header_layout.setSpacing(5)
 
-        icon_label = QLabel()
-        icon_size = 24
-        icon_label.setFixedSize(icon_size, icon_size)
+class ReplySignals(QObject):
+    """Carries scheduled replies' progress back to the GUI thread."""
+    partial_ready = Signal(object, str)
+    summary_ready = Signal(object, str, int)
+    finished = Signal(object)
 
-        if is_user:
-            icon = QIcon("icons/user_icon.png")
-            name = "You"
-        else:
-            icon = QIcon("icons/MyIQIcon.png")
-            name = "MyIQ"
-
-        pixmap = icon.pixmap(icon_size, icon_size)
-        icon_label.setPixmap(pixmap)
-
-        name_label = QLabel(name)
-        name_label.setStyleSheet("font-weight: bold; color: #555;")
-
-        header_layout.addWidget(icon_label)
-        header_layout.addWidget(name_label)
-        header_layout.addStretch()
-
-        layout.addWidget(header)
 
-        self.bubble = ChatBubble(text, is_user)
-        layout.addWidget(self.bubble)
+class ChatReplyJob:
+    """Builds the prompt for one question and streams the reply.
 
+    Runs on an LLM scheduler thread; the request is owned by the session's id
+    so the reply lands in that session whichever one is open by then.
+    """
 
-class LLMThread(QThread):
-    response_ready = Signal(str)
-
-    def __init__(self, prompt, conversation_history=None):
-        super().__init__()
+    def __init__(self, signals, session, prompt, conversation_history=None, attachments=None,
+                 first_seq=0, summary="", summary_upto=0):
+        self.signals = signals
+        self.session = session
         self.prompt = prompt
+        # Turns before this prompt; conversation_history[0] has seq first_seq
         self.conversation_history = conversation_history or []
+        self.attachments = attachments or []
+        self.first_seq = first_seq
+        self.summary = summary
+        self.summary_upto = summary_upto
+
+    def load_turns(self, start, end):
+        # Turns before the loaded page are already in the history store
+        if self.session.loader is None:
+            return []
+        return self.session.loader(self.session.session_id, start, end)
+
+    def __call__(self, request):
+        messages, summary, summary_upto = prepare_messages(
+            self.prompt,
+            self.conversation_history,
+            self.attachments,
+            first_seq=self.first_seq,
+            summary=self.summary,
+            summary_upto=self.summary_upto,
+            load_turns=self.load_turns,
+        )
+        if summary_upto != self.summary_upto:
+            self.signals.summary_ready.emit(request, summary, summary_upto)
+        try:
+            return request.stream_chat(messages).strip()
+        except Cancelled:
+            raise
+        except Exception as e:
+            return ("".join(request.pieces) + f"[Error talking to LLM: {e}]").strip()
 
-    def run(self):
-        # Include conversation history in the prompt for context
-        full_prompt = self.prompt
-        if self.conversation_history:
-            history_text = "\n\nConversation History:\n"
-            for msg in self.conversation_history[-10:]:  # Last 10 messages for context
-                role = "User" if msg['is_user'] else "Assistant"
-                history_text += f"{role}: {msg['text']}\n"
-            full_prompt = history_text + "\nCurrent message: " + self.prompt
-        
-        response = get_llm_response(full_prompt)
-        self.response_ready.emit(response)
+
+STREAM_REPAINT_MS = 50
+SEARCH_DEBOUNCE_MS = 200
+TITLE_ROLE = Qt.UserRole + 1
+UPDATED_ROLE = Qt.UserRole + 2
 
 
 class MyIQWindow(QMainWindow):
@@ -217,12 +89,37 @@ class MyIQWindow(QMainWindow):
         self.history_manager = ChatHistoryManager()
         self.current_session = None
         self.attachments = []
+        self.attachment_parser = AttachmentParser(self)
+        # Sidebar rows by session id, kept in step with saves instead of reloaded
+        self.session_items = {}
+
+        # Replies run on the shared LLM scheduler, at most one per session;
+        # each is routed back to its session by id
+        self.scheduler = get_scheduler()
+        self.reply_signals = ReplySignals(self)
+        self.replies = {}
+
+        # Streaming state: the current session's reply is repainted on a timer
+        self.stream_request = None
+        # Persistent, so it follows the bubble when older messages are prepended
+        self.stream_index = None
+        self.stream_timer = QTimer(self)
+        self.stream_timer.setSingleShot(True)
+        self.stream_timer.setInterval(STREAM_REPAINT_MS)
+        self.stream_timer.timeout.connect(self.flush_stream)
 
         self.setup_ui()
         self.setup_connections()
         self.load_session_list()
         self.create_new_session()
 
+        # Load the model in the background so the first message is not slowed
+        # down by it
+        self.scheduler.submit(
+            lambda request: warm_up(PromptBuilder().warm_up_messages()),
+            BACKGROUND, owner="warm-up",
+        )
+
     def setup_ui(self):
         # Main splitter
         main_splitter = QSplitter(Qt.Horizontal)
@@ -238,6 +135,14 @@ class MyIQWindow(QMainWindow):
         session_controls.addWidget(self.new_chat_button)
         session_controls.addWidget(self.delete_chat_button)
         
+        # Search box, filters the session list to ranked full-text hits
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search chats…")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+
         # Session list
         self.session_list = QTreeWidget()
         self.session_list.setHeaderLabels(["Chat Sessions"])
@@ -246,6 +151,7 @@ class MyIQWindow(QMainWindow):
         self.session_list.setContextMenuPolicy(Qt.CustomContextMenu)
         
         left_layout.addLayout(session_controls)
+        left_layout.addWidget(self.search_box)
         left_layout.addWidget(self.session_list)
         
         # Right panel - Chat area
@@ -254,29 +160,41 @@ class MyIQWindow(QMainWindow):
         
         # Chat title
         self.chat_title_label = QLabel("New Chat")
-        self.chat_title_label.setStyleSheet("font-size: 18px; font-weight: bold; padding: 10px;")
+        self.chat_title_label.setObjectName("pageTitle")
         
-        # Chat area
-        self.chat_area = QListWidget()
-        self.chat_area.setStyleSheet("background-color: #F7F7F8; border: none;")
+        # Chat area: a model/view list, only visible rows are painted
+        self.chat_model = ChatMessageModel(self)
+        self.chat_area = TranscriptView()
+        self.chat_area.setModel(self.chat_model)
+        self.chat_area.setItemDelegate(ChatBubbleDelegate(self.chat_area))
+        self.chat_area.setObjectName("transcript")
         self.chat_area.setSpacing(10)
         self.chat_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.chat_area.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.chat_area.setSelectionMode(QAbstractItemView.NoSelection)
+        # Re-query row heights on resize so bubbles reflow with the window
+        self.chat_area.setResizeMode(QListView.Adjust)
 
         # Input area
         input_widget = QWidget()
         input_layout = QVBoxLayout(input_widget)
         
-        # File attachments display
+        # File attachments display, with a cancel button while files are parsing
+        attachments_layout = QHBoxLayout()
         self.attachments_label = QLabel("")
-        self.attachments_label.setStyleSheet("color: #666; font-size: 12px; padding: 5px;")
+        self.attachments_label.setObjectName("attachments")
+        self.cancel_parse_button = QPushButton("Cancel")
+        self.cancel_parse_button.setVisible(False)
+        attachments_layout.addWidget(self.attachments_label, 1)
+        attachments_layout.addWidget(self.cancel_parse_button)
         
         # Input controls
         controls_layout = QHBoxLayout()
         self.upload_button = QPushButton()
-        self.upload_button.setIcon(QIcon("icons/paperclip.png"))
+        self.upload_button.setIcon(icon("paperclip.png"))
         self.upload_button.setFixedSize(32, 32)
         self.upload_button.setToolTip("Upload File")
-        self.upload_button.setStyleSheet("border:none;")
+        self.upload_button.setObjectName("iconButton")
 
         self.input_box = QTextEdit()
         self.input_box.setFixedHeight(45)
@@ -294,7 +212,7 @@ class MyIQWindow(QMainWindow):
         self.voice_button = QPushButton("🎙️ Voice On")
         voice_layout.addWidget(self.voice_button)
         
-        input_layout.addWidget(self.attachments_label)
+        input_layout.addLayout(attachments_layout)
         input_layout.addLayout(controls_layout)
         input_layout.addLayout(voice_layout)
         
@@ -308,19 +226,26 @@ class MyIQWindow(QMainWindow):
         main_splitter.setSizes([300, 900])
         
         self.setCentralWidget(main_splitter)
-        self.setStyleSheet(self.light_mode_style())
 
     def setup_connections(self):
-        self.send_button.clicked.connect(self.send_message)
+        self.send_button.clicked.connect(self.on_send_clicked)
+        self.reply_signals.partial_ready.connect(self.on_llm_partial)
+        self.reply_signals.summary_ready.connect(self.on_summary_ready)
+        self.reply_signals.finished.connect(self.on_llm_finished)
         self.upload_button.clicked.connect(self.upload_file)
+        self.cancel_parse_button.clicked.connect(self.attachment_parser.cancel)
+        self.attachment_parser.parsed.connect(self.on_attachment_parsed)
+        self.attachment_parser.failed.connect(self.on_attachment_failed)
+        self.attachment_parser.progress.connect(self.update_attachments_display)
+        self.attachment_parser.idle.connect(self.update_attachments_display)
         self.voice_button.clicked.connect(start_voice_listener)
         self.new_chat_button.clicked.connect(self.create_new_session)
         self.delete_chat_button.clicked.connect(self.delete_current_session)
         self.session_list.itemClicked.connect(self.load_selected_session)
         self.session_list.customContextMenuRequested.connect(self.show_context_menu)
-
-    def light_mode_style(self):
-        return light_mode(self)
+        self.chat_area.verticalScrollBar().valueChanged.connect(self.on_chat_scrolled)
+        self.search_box.textChanged.connect(self.search_timer.start)
+        self.search_timer.timeout.connect(self.filter_session_list)
 
     def eventFilter(self, obj, event):
         if obj == self.input_box and event.type() == QEvent.KeyPress:
@@ -337,8 +262,9 @@ class MyIQWindow(QMainWindow):
         self.current_session.title = f"Chat {datetime.now().strftime('%Y-%m-%d %H:%M')}"
         self.chat_title_label.setText(self.current_session.title)
         self.clear_chat_area()
-        self.load_session_list()
-        self.select_current_session()
+        self.update_send_button()
+        # Not listed until its first reply is saved
+        self.session_list.clearSelection()
 
     def delete_current_session(self):
         if not self.current_session:
@@ -352,8 +278,9 @@ class MyIQWindow(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
+            self.cancel_reply(self.current_session.session_id)
             self.history_manager.delete_session(self.current_session.session_id)
-            self.load_session_list()
+            self.remove_session_item(self.current_session.session_id)
             self.create_new_session()
 
     def load_selected_session(self, item):
@@ -364,101 +291,270 @@ class MyIQWindow(QMainWindow):
                 self.current_session = session
                 self.chat_title_label.setText(session.title)
                 self.load_chat_history()
+                self.update_send_button()
 
     def select_current_session(self):
         if not self.current_session:
             return
-            
-        for i in range(self.session_list.topLevelItemCount()):
-            item = self.session_list.topLevelItem(i)
-            if item.data(0, Qt.UserRole) == self.current_session.session_id:
-                self.session_list.setCurrentItem(item)
-                break
+
+        item = self.session_items.get(self.current_session.session_id)
+        if item is not None and self.session_list.indexOfTopLevelItem(item) >= 0:
+            self.session_list.setCurrentItem(item)
 
     def load_session_list(self):
+        # The only full read of the session list, at startup
         self.session_list.clear()
-        sessions = self.history_manager.get_session_list()
-        
-        for session_info in sessions:
+        self.session_items = {}
+        items = []
+        for session_info in self.history_manager.get_session_list():
             item = QTreeWidgetItem()
-            item.setText(0, session_info['title'])
             item.setData(0, Qt.UserRole, session_info['id'])
-            self.session_list.addTopLevelItem(item)
+            self.set_session_item(item, session_info['title'], session_info['updated_at'])
+            self.session_items[session_info['id']] = item
+            items.append(item)
+        self.session_list.addTopLevelItems(items)
+
+    def set_session_item(self, item, title, updated_at):
+        item.setText(0, title)
+        item.setToolTip(0, "")
+        item.setData(0, TITLE_ROLE, title)
+        item.setData(0, UPDATED_ROLE, updated_at)
+
+    def update_session_item(self, session):
+        """Refresh the session's row and move it to the top of the list."""
+        item = self.session_items.get(session.session_id)
+        if item is None:
+            item = QTreeWidgetItem()
+            item.setData(0, Qt.UserRole, session.session_id)
+            self.session_items[session.session_id] = item
+        self.set_session_item(item, session.title, session.updated_at.isoformat())
+        if self.search_box.text().strip():
+            # Search results keep their ranking until the query changes
+            return
+        index = self.session_list.indexOfTopLevelItem(item)
+        if index != 0:
+            if index > 0:
+                self.session_list.takeTopLevelItem(index)
+            self.session_list.insertTopLevelItem(0, item)
+
+    def remove_session_item(self, session_id):
+        item = self.session_items.pop(session_id, None)
+        if item is not None:
+            index = self.session_list.indexOfTopLevelItem(item)
+            if index >= 0:
+                self.session_list.takeTopLevelItem(index)
+
+    def filter_session_list(self):
+        self.session_list.invisibleRootItem().takeChildren()
+        query = self.search_box.text().strip()
+        if query:
+            items = []
+            for hit in self.history_manager.search(query):
+                item = self.session_items.get(hit['id'])
+                if item is None:
+                    continue
+                item.setText(0, f"{hit['title']}\n{hit['snippet']}")
+                item.setToolTip(0, hit['snippet'])
+                items.append(item)
+        else:
+            items = sorted(self.session_items.values(), key=lambda i: i.data(0, UPDATED_ROLE), reverse=True)
+            for item in items:
+                self.set_session_item(item, item.data(0, TITLE_ROLE), item.data(0, UPDATED_ROLE))
+        self.session_list.addTopLevelItems(items)
+        self.select_current_session()
 
     def load_chat_history(self):
         self.clear_chat_area()
         if self.current_session:
-            for message in self.current_session.messages:
-                self.add_chat_bubble(message['text'], message['is_user'])
+            self.chat_model.set_messages(self.current_session.messages)
+            self.chat_area.scrollToBottom()
 
     def clear_chat_area(self):
-        self.chat_area.clear()
+        self.reset_stream()
+        self.chat_model.clear()
 
     def add_chat_bubble(self, text, is_user=False):
-        widget = ChatItemWidget(text, is_user)
-        item = QListWidgetItem()
-        item.setSizeHint(widget.sizeHint())
-
-        self.chat_area.addItem(item)
-        self.chat_area.setItemWidget(item, widget)
+        row = self.chat_model.append_message(text, is_user)
         self.chat_area.scrollToBottom()
+        return row
+
+    def on_chat_scrolled(self, value):
+        if value == 0 and self.current_session and self.current_session.has_older():
+            self.load_older_messages()
+
+    def load_older_messages(self):
+        # Prepend the previous page and keep the visible messages in place
+        bar = self.chat_area.verticalScrollBar()
+        old_max = bar.maximum()
+        self.chat_model.prepend_messages(self.current_session.load_older())
+        self.chat_area.doItemsLayout()
+        bar.setValue(bar.maximum() - old_max)
+
+    def current_reply(self):
+        if self.current_session:
+            return self.replies.get(self.current_session.session_id)
+        return None
+
+    def session_for(self, request):
+        # The session may have been reopened as a new object since it asked
+        if self.current_session and self.current_session.session_id == request.owner:
+            return self.current_session
+        return request.job.session
+
+    def on_send_clicked(self):
+        reply = self.current_reply()
+        if reply is not None:
+            reply.cancel()
+        else:
+            self.send_message()
 
     def send_message(self):
+        # Attachments still parsing would be silently dropped, wait for them
+        if self.attachment_parser.is_busy() or self.current_reply() is not None:
+            return
         user_input = self.input_box.toPlainText().strip()
         if not user_input and not self.attachments:
             return
 
         user_message = user_input
         if self.attachments:
-            attach_text = "\n".join(f"📎 {os.path.basename(path)}" for path, _ in self.attachments)
+            attach_text = "\n".join(f"📎 {a['name']}" for a in self.attachments)
             user_message += "\n" + attach_text
 
         self.add_chat_bubble(user_message, is_user=True)
 
-        # Save user message to session
-        if self.current_session:
-            attachment_info = [(path, content) for path, content in self.attachments]
-            self.current_session.add_message(user_message, is_user=True, attachments=attachment_info)
-
+        # Save user message to session; saved now so reopening the session
+        # before the reply arrives still shows it
+        session = self.current_session
+        # Only a reference is stored; the parsed text lives in the parse cache
+        attachment_info = [
+            {'name': a['name'], 'path': a['path'], 'cache_key': a['cache_key']}
+            for a in self.attachments
+        ]
+        session.add_message(user_message, is_user=True, attachments=attachment_info)
+        self.history_manager.save_session(session)
+
+        # Attachment text is added to the prompt by the reply job, after
+        # retrieval picks the relevant chunks
+        attachments = list(self.attachments)
         self.input_box.clear()
         self.attachments.clear()
         self.update_attachments_display()
 
-        # Prepare prompt with attachments
-        prompt = user_input
-        if self.attachments:
-            for _, content in self.attachments:
-                prompt += f"\n\nAttached Content:\n{content}"
+        # Earlier turns for context; the prompt builder decides how many fit
+        self.reset_stream()
+        job = ChatReplyJob(
+            self.reply_signals,
+            session,
+            user_input,
+            session.messages[:-1],
+            attachments=attachments,
+            first_seq=session.first_loaded,
+            summary=session.summary,
+            summary_upto=session.summary_upto,
+        )
+        self.replies[session.session_id] = self.scheduler.submit(
+            job,
+            owner=session.session_id,
+            on_chunk=self.reply_signals.partial_ready.emit,
+            on_done=self.reply_signals.finished.emit,
+        )
+        self.update_send_button()
 
-        # Include conversation history for context
-        history = self.current_session.messages if self.current_session else []
-        self.thread = LLMThread(prompt, history)
-        self.thread.response_ready.connect(self.on_llm_response)
-        self.thread.start()
+    def cancel_reply(self, session_id):
+        # Dropped from replies first, so nothing is saved into a deleted session
+        request = self.replies.pop(session_id, None)
+        if request is not None:
+            request.cancel()
 
-    def on_llm_response(self, response):
-        self.add_chat_bubble(response, is_user=False)
-        
-        # Save assistant response to session
-        if self.current_session:
-            self.current_session.add_message(response, is_user=False)
-            self.history_manager.save_session(self.current_session)
-            self.load_session_list()
+    def reset_stream(self):
+        self.stream_timer.stop()
+        self.stream_request = None
+        self.stream_index = None
+
+    def on_llm_partial(self, request, chunk):
+        if self.current_reply() is not request:
+            return
+        self.stream_request = request
+        if not self.stream_timer.isActive():
+            self.stream_timer.start()
+
+    def flush_stream(self):
+        if self.stream_request is not None:
+            self.update_stream_bubble("".join(self.stream_request.pieces))
+
+    def update_stream_bubble(self, text):
+        if self.stream_index is None or not self.stream_index.isValid():
+            row = self.add_chat_bubble(text, is_user=False)
+            self.stream_index = QPersistentModelIndex(self.chat_model.index(row))
+            return
+        self.chat_model.set_text(self.stream_index.row(), text)
+        self.chat_area.scrollToBottom()
+
+    def on_summary_ready(self, request, summary, summary_upto):
+        # Persisted with the assistant reply that follows
+        if self.replies.get(request.owner) is request:
+            session = self.session_for(request)
+            session.summary = summary
+            session.summary_upto = summary_upto
+
+    def on_llm_finished(self, request):
+        if self.replies.get(request.owner) is not request:
+            return
+        del self.replies[request.owner]
+        if request.error is not None:
+            response = f"[Error talking to LLM: {request.error}]"
+        elif request.is_cancelled():
+            response = "".join(request.pieces).strip() or "[Stopped]"
+        else:
+            response = request.result
+
+        session = self.session_for(request)
+        if session is self.current_session:
+            self.stream_timer.stop()
+            if self.stream_request is not request:
+                self.stream_index = None
+            self.update_stream_bubble(response)
+            self.reset_stream()
+
+        # Save assistant response to its session
+        session.add_message(response, is_user=False)
+        self.history_manager.save_session(session)
+        self.update_session_item(session)
+        if session is self.current_session:
             self.select_current_session()
+        self.update_send_button()
 
     def upload_file(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Open File")
-        if file_path:
-            content = parse_file(file_path)
-            self.attachments.append((file_path, content))
-            self.update_attachments_display()
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Open Files")
+        if file_paths:
+            self.attachment_parser.submit(file_paths)
+
+    def on_attachment_parsed(self, attachment):
+        self.attachments.append(attachment)
+
+    def on_attachment_failed(self, path, error):
+        QMessageBox.warning(self, "Attachment", f"Could not parse {os.path.basename(path)}:\n{error}")
 
     def update_attachments_display(self):
+        parts = []
         if self.attachments:
-            files = [os.path.basename(path) for path, _ in self.attachments]
-            self.attachments_label.setText(f"📎 Attached: {', '.join(files)}")
-        else:
-            self.attachments_label.setText("")
+            files = [a['name'] for a in self.attachments]
+            parts.append(f"📎 Attached: {', '.join(files)}")
+        busy = self.attachment_parser.is_busy()
+        if busy:
+            parser = self.attachment_parser
+            pending = ", ".join(parser.pending_names())
+            parts.append(f"⏳ Parsing {parser.done + 1} of {parser.total}: {pending}")
+        self.attachments_label.setText("   ".join(parts))
+        self.cancel_parse_button.setVisible(busy)
+        self.update_send_button()
+
+    def update_send_button(self):
+        # While the open session waits for its reply the button stops it
+        replying = self.current_reply() is not None
+        self.send_button.setText("Stop" if replying else "Send")
+        self.send_button.setEnabled(replying or not self.attachment_parser.is_busy())
 
     def show_context_menu(self, position):
         item = self.session_list.itemAt(position)
@@ -477,25 +573,27 @@ class MyIQWindow(QMainWindow):
 
     def rename_session(self, item):
         session_id = item.data(0, Qt.UserRole)
-        current_title = item.text(0)
+        current_title = item.data(0, TITLE_ROLE)
         
         new_title, ok = QInputDialog.getText(
             self, 'Rename Chat', 'Enter new title:', text=current_title
         )
         
         if ok and new_title.strip():
-            session = self.history_manager.load_session(session_id)
-            if session:
-                session.title = new_title.strip()
-                self.history_manager.save_session(session)
-                self.load_session_list()
-                if self.current_session and self.current_session.session_id == session_id:
-                    self.current_session.title = new_title.strip()
-                    self.chat_title_label.setText(new_title.strip())
+            self.history_manager.rename_session(session_id, new_title.strip())
+            item.setData(0, TITLE_ROLE, new_title.strip())
+            item.setText(0, new_title.strip())
+            if self.current_session and self.current_session.session_id == session_id:
+                self.current_session.title = new_title.strip()
+                self.chat_title_label.setText(new_title.strip())
+            # A reply still running saves through the session it was sent from
+            request = self.replies.get(session_id)
+            if request is not None:
+                request.job.session.title = new_title.strip()
 
     def delete_session(self, item):
         session_id = item.data(0, Qt.UserRole)
-        session_title = item.text(0)
+        session_title = item.data(0, TITLE_ROLE)
         
         reply = QMessageBox.question(
             self, 'Delete Chat', 
@@ -505,7 +603,8 @@ class MyIQWindow(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
+            self.cancel_reply(session_id)
             self.history_manager.delete_session(session_id)
-            self.load_session_list()
+            self.remove_session_item(session_id)
             if self.current_session and self.current_session.session_id == session_id:
                 self.create_new_session()
@@ -0,0 +1,342 @@
+# app/chat_transcript.py
+import math
+from collections import OrderedDict
+from string import Template
+
+from PySide6.QtWidgets import QAbstractScrollArea, QListView, QStyledItemDelegate
+from PySide6.QtCore import Qt, QEvent, QAbstractListModel, QModelIndex, QPointF, QRect, QSize
+from PySide6.QtGui import QPainter, QFont, QTextDocument, QTextLayout, QTextOption
+
+from markdown_blocks import block_source, link_definitions, split_markdown_blocks
+from resources import pixmap
+from theme import THEMES, color, current_theme
+
+IS_USER_ROLE = Qt.UserRole + 1
+LAYOUT_CACHE_SIZE = 512
+MARKDOWN_CACHE_SIZE = 256
+BLOCK_CACHE_SIZE = 4096
+BLOCK_SPACING = 8
+
+MARKDOWN_EXTRAS = ["fenced-code-blocks", "tables", "cuddled-lists", "strike"]
+# Blocks are separate documents, BLOCK_SPACING stands in for their margins
+MARKDOWN_STYLE = Template("""
+body { color: ${bubble_text}; }
+p, pre, ul, ol, table, h1, h2, h3, h4, h5, h6 { margin-top: 0px; margin-bottom: 0px; }
+pre { background-color: ${code_background}; font-family: monospace; }
+code { font-family: monospace; background-color: ${code_background}; }
+table { border-collapse: collapse; border-style: solid; border-width: 1px; border-color: ${bot_bubble_border}; }
+th, td { padding: 2px 6px; }
+th { background-color: ${code_background}; }
+""")
+
+def markdown_html(block):
+    import markdown2
+    return markdown2.markdown(block, extras=MARKDOWN_EXTRAS, safe_mode="escape")
+
+
+class ChatMessageModel(QAbstractListModel):
+    """List model over the loaded messages of a chat session.
+
+    Rows are the session's message dicts ({'text', 'is_user', ...}); the
+    view only asks for the rows it shows, so a session costs the same to
+    open whatever its length.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.messages = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.messages)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        message = self.messages[index.row()]
+        if role == Qt.DisplayRole:
+            return message['text']
+        if role == IS_USER_ROLE:
+            return message['is_user']
+        return None
+
+    def set_messages(self, messages):
+        self.beginResetModel()
+        self.messages = list(messages)
+        self.endResetModel()
+
+    def clear(self):
+        self.set_messages([])
+
+    def append_message(self, text, is_user=False):
+        row = len(self.messages)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.messages.append({'text': text, 'is_user': is_user})
+        self.endInsertRows()
+        return row
+
+    def prepend_messages(self, messages):
+        if not messages:
+            return
+        self.beginInsertRows(QModelIndex(), 0, len(messages) - 1)
+        self.messages[:0] = messages
+        self.endInsertRows()
+
+    def set_text(self, row, text):
+        self.messages[row] = dict(self.messages[row], text=text)
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole])
+
+
+class TranscriptView(QListView):
+    """List view for the transcript that re-lays out its rows once per restyle.
+
+    QAbstractItemView lays every row out again on each StyleChange, and
+    applying a stylesheet or palette re-polishes the view several times in a
+    row; with a long transcript that is thousands of size queries. Here the
+    layout is only scheduled, so the repeats collapse into one.
+    """
+
+    def event(self, event):
+        if event.type() == QEvent.StyleChange:
+            # A theme switch restyles every widget; the delegate follows it
+            delegate = self.itemDelegate()
+            if isinstance(delegate, ChatBubbleDelegate):
+                delegate.update_theme()
+            self.scheduleDelayedItemsLayout()
+            # Skip QAbstractItemView's immediate layout, keep the frame's handling
+            return QAbstractScrollArea.event(self, event)
+        return super().event(event)
+
+
+class TextLayoutCache:
+    """LRU of wrapped text layouts keyed by (text, font, width).
+
+    Wrapping a long message is the expensive part of painting it, so each
+    layout is built once and reused by every later paint and size query;
+    a new one is only made when the text, font or wrap width changes.
+    """
+
+    def __init__(self, capacity=LAYOUT_CACHE_SIZE):
+        self.capacity = capacity
+        self.layouts = OrderedDict()
+
+    def get(self, text, font, width):
+        """Return (layout, size) where size is the wrapped text's extent."""
+        key = (text, font.key(), width)
+        entry = self.layouts.get(key)
+        if entry is None:
+            entry = self.layouts[key] = self.build(text, font, width)
+            if len(self.layouts) > self.capacity:
+                self.layouts.popitem(last=False)
+        else:
+            self.layouts.move_to_end(key)
+        return entry
+
+    def build(self, text, font, width):
+        # QTextLayout only breaks lines at Unicode line separators
+        layout = QTextLayout(text.replace("\n", "\u2028"), font)
+        option = QTextOption(Qt.AlignLeft)
+        option.setWrapMode(QTextOption.WrapAtWordBoundaryOrAnywhere)
+        layout.setTextOption(option)
+        layout.setCacheEnabled(True)
+
+        height = 0.0
+        natural_width = 0.0
+        layout.beginLayout()
+        while True:
+            line = layout.createLine()
+            if not line.isValid():
+                break
+            line.setLineWidth(width)
+            line.setPosition(QPointF(0, height))
+            height += line.height()
+            natural_width = max(natural_width, line.naturalTextWidth())
+        layout.endLayout()
+        return layout, QSize(math.ceil(natural_width), math.ceil(height))
+
+    def clear(self):
+        self.layouts.clear()
+
+
+class BlockDocumentCache(TextLayoutCache):
+    """LRU of laid-out documents, one per top-level markdown block."""
+
+    def __init__(self, capacity=BLOCK_CACHE_SIZE):
+        super().__init__(capacity)
+        # Converted HTML outlives the documents, so a resize re-lays out blocks without re-parsing them
+        self.html = OrderedDict()
+        self.style = MARKDOWN_STYLE.substitute(THEMES[current_theme()])
+
+    def set_theme(self, name):
+        # Documents keep the colors they were laid out with; the HTML stays valid
+        self.style = MARKDOWN_STYLE.substitute(THEMES[name])
+        self.layouts.clear()
+
+    def block_html(self, block):
+        html = self.html.get(block)
+        if html is None:
+            html = self.html[block] = markdown_html(block)
+            if len(self.html) > self.capacity:
+                self.html.popitem(last=False)
+        else:
+            self.html.move_to_end(block)
+        return html
+
+    def build(self, block, font, width):
+        document = QTextDocument()
+        document.setDefaultFont(font)
+        document.setDefaultStyleSheet(self.style)
+        document.setDocumentMargin(0)
+        document.setHtml(self.block_html(block))
+        document.setTextWidth(width)
+        return document, QSize(math.ceil(document.idealWidth()), math.ceil(document.size().height()))
+
+
+class MarkdownCache(TextLayoutCache):
+    """LRU of assistant messages rendered as stacks of block documents.
+
+    Each top-level block is parsed and laid out on its own through a shared
+    BlockDocumentCache, so while an answer streams in only its last,
+    still-growing block is converted again; the blocks before it are reused
+    as they are, and painting skips blocks outside the visible area.
+    """
+
+    def __init__(self, capacity=MARKDOWN_CACHE_SIZE):
+        super().__init__(capacity)
+        self.blocks = BlockDocumentCache()
+
+    def build(self, text, font, width):
+        definitions = link_definitions(text)
+        sources = [block_source(block, definitions) for block in split_markdown_blocks(text, close_fence=True)]
+        documents = [self.blocks.get(source, font, width) for source in sources if source]
+        width = max((size.width() for _, size in documents), default=0)
+        height = sum(size.height() for _, size in documents) + BLOCK_SPACING * max(0, len(documents) - 1)
+        return documents, QSize(width, height)
+
+    def clear(self):
+        super().clear()
+        self.blocks.clear()
+
+    def set_theme(self, name):
+        super().clear()
+        self.blocks.set_theme(name)
+
+
+def draw_markdown(painter, documents, origin, clip):
+    """Draw a MarkdownCache entry at origin, skipping blocks outside clip."""
+    top = origin.y()
+    for document, size in documents:
+        if top > clip.bottom():
+            break
+        if top + size.height() >= clip.top():
+            painter.save()
+            painter.translate(origin.x(), top)
+            document.drawContents(painter)
+            painter.restore()
+        top += size.height() + BLOCK_SPACING
+
+
+class ChatBubbleDelegate(QStyledItemDelegate):
+    """Paints a message row: icon and name header above a rounded bubble.
+
+    Bubbles wrap at a share of the view's width, so they reflow when the
+    window is resized. User messages are plain text from a TextLayoutCache;
+    assistant messages are rendered as markdown from a MarkdownCache.
+    """
+
+    margin = 15
+    padding = 10
+    # Bubbles take at most this share of the row and never wrap narrower than min_width
+    width_fraction = 0.75
+    min_width = 120
+    icon_size = 24
+    header_spacing = 2
+    row_margins = (10, 5, 10, 5)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.user_pixmap = pixmap("user_icon.png", self.icon_size)
+        self.bot_pixmap = pixmap("MyIQIcon.png", self.icon_size)
+        self.layouts = TextLayoutCache()
+        self.documents = MarkdownCache()
+        self.theme = None
+        self.update_theme()
+
+    def update_theme(self):
+        """Take the current theme's colors, restyling cached markdown if it changed."""
+        name = current_theme()
+        if name == self.theme:
+            return
+        if self.theme is not None:
+            self.documents.set_theme(name)
+        self.theme = name
+        self.colors = {key: color(key) for key in (
+            "sender", "user_bubble", "user_bubble_border", "bot_bubble", "bot_bubble_border", "bubble_text"
+        )}
+
+    def row_width(self, option):
+        view = option.widget
+        width = view.viewport().width() if view is not None else option.rect.width()
+        left, top, right, bottom = self.row_margins
+        return width - left - right
+
+    def wrap_width(self, row_width):
+        available = int((row_width - 2 * self.margin) * self.width_fraction) - 2 * self.padding
+        return max(self.min_width, available)
+
+    def text_layout(self, option, text, is_user):
+        cache = self.layouts if is_user else self.documents
+        return cache.get(text, option.font, self.wrap_width(self.row_width(option)))
+
+    def sizeHint(self, option, index):
+        _, text_size = self.text_layout(option, index.data(Qt.DisplayRole), index.data(IS_USER_ROLE))
+        left, top, right, bottom = self.row_margins
+        height = (top + self.icon_size + self.header_spacing
+                  + text_size.height() + 2 * self.padding + 2 * self.margin + bottom)
+        return QSize(self.row_width(option) + left + right, height)
+
+    def paint(self, painter, option, index):
+        text = index.data(Qt.DisplayRole)
+        is_user = index.data(IS_USER_ROLE)
+        left, top, right, bottom = self.row_margins
+        row = option.rect.adjusted(left, top, -right, -bottom)
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        # Header: icon and name
+        pixmap = self.user_pixmap if is_user else self.bot_pixmap
+        painter.drawPixmap(row.left(), row.top(), pixmap)
+        name_font = QFont(option.font)
+        name_font.setBold(True)
+        painter.setFont(name_font)
+        painter.setPen(self.colors["sender"])
+        name_rect = QRect(row.left() + self.icon_size + 5, row.top(), row.width(), self.icon_size)
+        painter.drawText(name_rect, Qt.AlignVCenter | Qt.AlignLeft, "You" if is_user else "MyIQ")
+
+        # Bubble, sized to the wrapped text and right-aligned for the user
+        layout, text_size = self.text_layout(option, text, is_user)
+        bubble_width = min(text_size.width() + 2 * self.padding, row.width() - 2 * self.margin)
+        bubble_height = text_size.height() + 2 * self.padding
+        bubble_top = row.top() + self.icon_size + self.header_spacing + self.margin
+        if is_user:
+            bubble_left = row.right() - self.margin - bubble_width
+        else:
+            bubble_left = row.left() + self.margin
+        bubble = QRect(bubble_left, bubble_top, bubble_width, bubble_height)
+
+        painter.setBrush(self.colors["user_bubble"] if is_user else self.colors["bot_bubble"])
+        painter.setPen(self.colors["user_bubble_border"] if is_user else self.colors["bot_bubble_border"])
+        painter.drawRoundedRect(bubble, 10, 10)
+
+        origin = QPointF(bubble.left() + self.padding, bubble.top() + self.padding)
+        if is_user:
+            painter.setPen(self.colors["bubble_text"])
+            layout.draw(painter, origin)
+        else:
+            # Code block backgrounds span the wrap width, keep them inside the bubble
+            content = bubble.adjusted(self.padding, self.padding, -self.padding, -self.padding)
+            painter.setClipRect(content)
+            clip = option.widget.viewport().rect() if option.widget is not None else option.rect
+            draw_markdown(painter, layout, origin, clip)
+        painter.restore()
@@ -9,17 +9,7 @@ class CollapsibleSection(QWidget):
         self.toggle_button = QPushButton(title)
         self.toggle_button.setCheckable(True)
         self.toggle_button.setChecked(True)
-        self.toggle_button.setStyleSheet("""
-            QPushButton {
-                border: none;
-                font-weight: bold;
-                text-align: left;
-                padding: 8px;
-            }
-            QPushButton:checked {
-                background-color: #D0D0D0;
-            }
-        """)
+        self.toggle_button.setObjectName("sectionToggle")
 
         self.content_area = QWidget()
         self.content_area.setMaximumHeight(0)
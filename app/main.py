@@ -1,17 +1,35 @@
+import time
+
+STARTED = time.perf_counter()
+
+import importlib
+import os
 import sys
+
+# The GUI-free core is the myiq package next to app/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget,
     QVBoxLayout, QHBoxLayout, QPushButton,
     QStackedWidget, QFrame, QToolButton, QLabel
 )
 from PySide6.QtGui import QIcon
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QEvent, QObject, QTimer
+
+from theme import apply_theme
 
-from chat_app import MyIQWindow
-from calendar_app import CalendarApp
-from notebook import NotebookWidget
 # from widgets.mindmap_widget import MindMapWidget
 
+# Stack pages as (module, class); each is imported and built on first visit
+PAGES = [
+    ("chat_app", "MyIQWindow"),
+    ("calendar_app", "CalendarApp"),
+    ("notebook", "NotebookWidget"),
+]
+
 
 class MainApp(QMainWindow):
     def __init__(self):
@@ -25,8 +43,8 @@ class MainApp(QMainWindow):
 
         top_bar = QHBoxLayout()
         self.hamburger_btn = QToolButton()
+        self.hamburger_btn.setObjectName("hamburger")
         self.hamburger_btn.setText("☰")
-        self.hamburger_btn.setStyleSheet("font-size: 22px; border: none;")
         self.hamburger_btn.clicked.connect(self.toggle_sidebar)
         top_bar.addWidget(self.hamburger_btn)
         top_bar.addStretch()
@@ -35,49 +53,27 @@ class MainApp(QMainWindow):
         content_layout.setContentsMargins(0, 0, 0, 0)
 
         self.sidebar = QFrame()
+        self.sidebar.setObjectName("sidebar")
         self.sidebar.setMinimumWidth(220)
-        self.sidebar.setStyleSheet("background-color: #F7F7F8;")
         self.sidebar_layout = QVBoxLayout(self.sidebar)
         self.sidebar_layout.setSpacing(10)
         self.sidebar_layout.setContentsMargins(10, 20, 10, 10)
 
-        button_style = """
-            QPushButton {
-                background-color: transparent;
-                border: none;
-                text-align: left;
-                padding: 10px 15px;
-                font-size: 16px;
-                color: #333;
-            }
-            QPushButton:hover {
-                background-color: #eaeaea;
-            }
-            QPushButton:checked {
-                background-color: #dcdcdc;
-                font-weight: bold;
-            }
-        """
-
         self.chat_btn = QPushButton("🧠  Intelligence")
         self.cal_btn = QPushButton("📆  Timeline")
         self.notes_btn = QPushButton("📝  Notebook")
 
         for btn in [self.chat_btn, self.cal_btn, self.notes_btn]:
+            btn.setObjectName("navButton")
             btn.setCheckable(True)
-            btn.setStyleSheet(button_style)
             self.sidebar_layout.addWidget(btn)
 
         self.sidebar_layout.addStretch()
 
         self.stack = QStackedWidget()
-        self.chat_widget = MyIQWindow()
-        self.calendar_widget = CalendarApp()
-        self.notes_widget = NotebookWidget()
-
-        self.stack.addWidget(self.chat_widget)
-        self.stack.addWidget(self.calendar_widget)
-        self.stack.addWidget(self.notes_widget)
+        self.pages = [None] * len(PAGES)
+        for _ in PAGES:
+            self.stack.addWidget(QWidget())
 
         self.chat_btn.clicked.connect(lambda: self.switch_app(0))
         self.cal_btn.clicked.connect(lambda: self.switch_app(1))
@@ -96,15 +92,49 @@ class MainApp(QMainWindow):
     def toggle_sidebar(self):
         self.sidebar.setVisible(not self.sidebar.isVisible())
 
+    def page(self, index):
+        if self.pages[index] is None:
+            module_name, class_name = PAGES[index]
+            widget = getattr(importlib.import_module(module_name), class_name)()
+            placeholder = self.stack.widget(index)
+            self.stack.insertWidget(index, widget)
+            self.stack.removeWidget(placeholder)
+            placeholder.deleteLater()
+            self.pages[index] = widget
+        return self.pages[index]
+
     def switch_app(self, index):
-        self.stack.setCurrentIndex(index)
+        self.stack.setCurrentWidget(self.page(index))
         for btn in [self.chat_btn, self.cal_btn, self.notes_btn]:
             btn.setChecked(False)
         [self.chat_btn, self.cal_btn, self.notes_btn][index].setChecked(True)
 
 
+class FirstPaintProbe(QObject):
+    """Prints the time to the window's first paint and quits (MYIQ_STARTUP_BENCH=1)."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.painted = False
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and not self.painted:
+            self.painted = True
+            # Report once this paint has finished
+            QTimer.singleShot(0, self.report)
+        return False
+
+    def report(self):
+        print(f"first paint: {(time.perf_counter() - STARTED) * 1000:.1f} ms", flush=True)
+        self.app.quit()
+
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    apply_theme(app)
     window = MainApp()
+    if os.environ.get("MYIQ_STARTUP_BENCH"):
+        window.installEventFilter(FirstPaintProbe(app))
     window.show()
     sys.exit(app.exec())
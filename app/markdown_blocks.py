@@ -0,0 +1,76 @@
+# app/markdown_blocks.py
+"""Split markdown into top-level blocks that render on their own.
+
+Shared by the chat transcript, which lays out each block of a message as its
+own document, and the notebook preview, which patches its page block by
+block. Either way a block must render the same alone as within the whole
+text.
+"""
+import re
+
+FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+LIST_ITEM = re.compile(r"^ {0,3}([*+-]|\d+[.)])\s")
+# Reference link definitions apply to the whole document
+LINK_DEFINITION = re.compile(r"^ {0,3}\[[^\]]+\]:.*$", re.M)
+
+
+def split_markdown_blocks(text, close_fence=False):
+    """Split markdown into top-level blocks at blank lines.
+
+    Code fences and display math ($$ or \\[ \\]) are never split. Neither is
+    a list, nor anything whose next line after the blank is indented. With
+    close_fence, a fence left open at the end (a message still streaming)
+    is closed so the partial code renders as code.
+    """
+    blocks = []
+    current = []
+    blank = 0
+    closer = None
+    for line in text.split("\n"):
+        if closer:
+            current.append(line)
+            if closer == "$$":
+                closed = "$$" in line
+            else:
+                closed = line.strip().startswith(closer)
+            if closed:
+                closer = None
+            continue
+        if not line.strip():
+            if current:
+                blank += 1
+            continue
+        if blank:
+            continues = line[:1] in (" ", "\t") or (LIST_ITEM.match(line) and LIST_ITEM.match(current[0]))
+            if continues:
+                current.extend([""] * blank)
+            else:
+                blocks.append("\n".join(current))
+                current = []
+            blank = 0
+        current.append(line)
+        stripped = line.strip()
+        fence = FENCE.match(line)
+        if fence:
+            closer = fence.group(1)
+        elif stripped.startswith("$$") and stripped.count("$$") == 1:
+            closer = "$$"
+        elif stripped.startswith("\\[") and "\\]" not in stripped:
+            closer = "\\]"
+    if close_fence and closer and closer[0] in "`~":
+        current.append(closer)
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+
+def link_definitions(text):
+    return "\n".join(LINK_DEFINITION.findall(text))
+
+
+def block_source(block, definitions):
+    """The markdown to convert for a block: "" if it only defines links,
+    otherwise the block with the document's definitions if it may use them."""
+    if not LINK_DEFINITION.sub("", block).strip():
+        return ""
+    return f"{block}\n\n{definitions}" if definitions and "[" in block else block
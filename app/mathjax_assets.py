@@ -0,0 +1,10 @@
+# app/mathjax_assets.py
+"""Where the local MathJax copy lives. Kept free of dependencies so
+scripts/fetch_mathjax.py can run before the app's packages are installed."""
+import os
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+MATHJAX_VERSION = "3.2.2"
+# Relative to ASSETS_DIR, which is the base URL of viewer pages
+MATHJAX_SCRIPT = "mathjax/tex-mml-chtml.js"
+MATHJAX_CDN = f"https://cdn.jsdelivr.net/npm/mathjax@{MATHJAX_VERSION}/es5/tex-mml-chtml.js"
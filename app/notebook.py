@@ -1,79 +1,48 @@
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QTextEdit, QPushButton, QLabel,
+    QApplication, QWidget, QVBoxLayout, QTextEdit, QPushButton, QLabel,
     QHBoxLayout, QListWidget, QListWidgetItem, QInputDialog,
-    QMessageBox, QSplitter, QFileDialog
+    QMessageBox, QSplitter, QFileDialog, QLineEdit
 )
 from PySide6.QtWebEngineWidgets import QWebEngineView
-from PySide6.QtCore import Qt
-import markdown2
-from datetime import datetime
-import os
-import json
+from PySide6.QtCore import Qt, QTimer
 
-from style import light_mode
+from myiq.notebooks import NotebookSession, NotebookManager
+from notebook_html import NotebookPreview, notebook_page
 
-class NotebookSession:
-    def __init__(self, session_id=None, title="Untitled", content=""):
-        self.session_id = session_id or datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.title = title
-        self.content = content
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
-
-    def to_dict(self):
-        return {
-            "session_id": self.session_id,
-            "title": self.title,
-            "content": self.content,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat()
-        }
-
-    @classmethod
-    def from_dict(cls, data):
-        session = cls(data['session_id'], data['title'], data['content'])
-        session.created_at = datetime.fromisoformat(data['created_at'])
-        session.updated_at = datetime.fromisoformat(data['updated_at'])
-        return session
-
-class NotebookManager:
-    def __init__(self, data_dir="notebook_data"):
-        self.data_dir = data_dir
-        os.makedirs(data_dir, exist_ok=True)
-
-    def get_all_sessions(self):
-        notebooks = []
-        for fname in os.listdir(self.data_dir):
-            if fname.endswith(".json"):
-                path = os.path.join(self.data_dir, fname)
-                with open(path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    notebooks.append(NotebookSession.from_dict(data))
-        notebooks.sort(key=lambda x: x.updated_at, reverse=True)
-        return notebooks
-
-    def save_session(self, session: NotebookSession):
-        session.updated_at = datetime.now()
-        path = os.path.join(self.data_dir, f"{session.session_id}.json")
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(session.to_dict(), f, ensure_ascii=False, indent=2)
-
-    def delete_session(self, session_id):
-        path = os.path.join(self.data_dir, f"{session_id}.json")
-        if os.path.exists(path):
-            os.remove(path)
+SEARCH_DEBOUNCE_MS = 200
+# Edits are handed to the background writer once typing pauses this long
+AUTOSAVE_MS = 1000
+# The preview follows the editor once typing pauses this long
+PREVIEW_DEBOUNCE_MS = 300
+# PDF export waits for MathJax to finish typesetting, but not forever
+PDF_POLL_MS = 50
+PDF_TYPESET_TIMEOUT_MS = 5000
 
 class NotebookWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.manager = NotebookManager()
         self.current_session = None
-        self.setStyleSheet(self.light_mode_style())
+        self.pdf_path = None
+        self.pdf_waited = None
 
         layout = QHBoxLayout(self)
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search notebooks…")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.setSingleShot(True)
+        self.autosave_timer.setInterval(AUTOSAVE_MS)
         self.list = QListWidget()
         self.editor = QTextEdit()
         self.viewer = QWebEngineView()
+        self.preview = NotebookPreview(self.viewer, self)
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DEBOUNCE_MS)
 
         # Buttons
         button_bar = QHBoxLayout()
@@ -120,15 +89,18 @@ class NotebookWidget(QWidget):
         right_layout.addWidget(splitter)
         right_panel.setLayout(right_layout)
 
-        layout.addWidget(self.list, 1)
+        left_panel = QWidget()
+        left_layout = QVBoxLayout(left_panel)
+        left_layout.setContentsMargins(0, 0, 0, 0)
+        left_layout.addWidget(self.search_box)
+        left_layout.addWidget(self.list)
+
+        layout.addWidget(left_panel, 1)
         layout.addWidget(right_panel, 3)
 
         self.load_sessions()
         self.setup_connections()
 
-    def light_mode_style(self):
-        return light_mode(self)
-
     def setup_connections(self):
         self.new_btn.clicked.connect(self.create_new)
         self.save_btn.clicked.connect(self.save_current)
@@ -138,12 +110,31 @@ class NotebookWidget(QWidget):
         self.export_html_btn.clicked.connect(self.export_html)
         self.export_pdf_btn.clicked.connect(self.export_pdf)
         self.export_md_btn.clicked.connect(self.export_markdown)
+        self.viewer.loadFinished.connect(self.on_viewer_loaded)
+        self.viewer.page().pdfPrintingFinished.connect(self.on_pdf_ready)
         self.list.itemClicked.connect(self.load_selected)
+        self.search_box.textChanged.connect(self.search_timer.start)
+        self.search_timer.timeout.connect(self.load_sessions)
+        self.editor.textChanged.connect(self.autosave_timer.start)
+        self.editor.textChanged.connect(self.preview_timer.start)
+        self.preview_timer.timeout.connect(self.update_preview)
+        self.autosave_timer.timeout.connect(self.autosave)
+        QApplication.instance().aboutToQuit.connect(self.autosave)
+
+    def autosave(self):
+        self.autosave_timer.stop()
+        if not self.current_session:
+            return
+        content = self.editor.toPlainText()
+        if content != self.current_session.content:
+            self.current_session.content = content
+            self.manager.save_session(self.current_session)
 
     def create_new(self):
+        self.autosave()
         self.current_session = NotebookSession()
         self.editor.clear()
-        self.viewer.setHtml("")
+        self.preview.clear()
         self.load_sessions()
 
     def save_current(self):
@@ -165,22 +156,35 @@ class NotebookWidget(QWidget):
             return
         confirm = QMessageBox.question(self, "Delete", f"Delete notebook '{self.current_session.title}'?")
         if confirm == QMessageBox.Yes:
+            self.autosave_timer.stop()
             self.manager.delete_session(self.current_session.session_id)
             self.current_session = None
             self.editor.clear()
-            self.viewer.setHtml("")
+            self.preview.clear()
             self.load_sessions()
 
     def load_sessions(self):
         self.list.clear()
-        sessions = self.manager.get_all_sessions()
-        for s in sessions:
-            item = QListWidgetItem(s.title)
-            item.setData(Qt.UserRole, s)
+        query = self.search_box.text().strip()
+        if query:
+            for s, snippet in self.manager.search(query):
+                item = QListWidgetItem(f"{s['title']}\n{snippet}")
+                item.setToolTip(snippet)
+                item.setData(Qt.UserRole, s['id'])
+                self.list.addItem(item)
+            return
+
+        for s in self.manager.get_session_list():
+            item = QListWidgetItem(s['title'])
+            item.setData(Qt.UserRole, s['id'])
             self.list.addItem(item)
 
     def load_selected(self, item):
-        session = item.data(Qt.UserRole)
+        self.autosave()
+        session = self.manager.load_session(item.data(Qt.UserRole))
+        if session is None:
+            self.load_sessions()
+            return
         self.current_session = session
         self.editor.setPlainText(session.content)
         self.render_content()
@@ -188,39 +192,17 @@ class NotebookWidget(QWidget):
     def render_content(self):
         if not self.current_session:
             return
-        content = self.editor.toPlainText()
-        html = markdown2.markdown(content)
-        template = f"""
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <script src="https://polyfill.io/v3/polyfill.min.js?features=es6"></script>
-            <script type="text/javascript" id="MathJax-script" async
-              src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js">
-            </script>
-        </head>
-        <body>{html}</body>
-        </html>
-        """
-        self.viewer.setHtml(template)
+        self.preview_timer.stop()
+        self.preview.show(self.editor.toPlainText())
+
+    def update_preview(self):
+        if self.current_session:
+            self.preview.update(self.editor.toPlainText())
 
     def export_html(self):
         if not self.current_session:
             return
-        content = self.editor.toPlainText()
-        html = markdown2.markdown(content)
-        full_html = f"""
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <script src="https://polyfill.io/v3/polyfill.min.js?features=es6"></script>
-            <script type="text/javascript" id="MathJax-script" async
-              src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js">
-            </script>
-        </head>
-        <body>{html}</body>
-        </html>
-        """
+        full_html = notebook_page(self.editor.toPlainText(), self.current_session.title, portable=True)
         path, _ = QFileDialog.getSaveFileName(self, "Export as HTML", f"{self.current_session.title}.html", "HTML Files (*.html)")
         if path:
             with open(path, "w", encoding="utf-8") as f:
@@ -230,30 +212,36 @@ class NotebookWidget(QWidget):
     def export_pdf(self):
         if not self.current_session:
             return
-        content = self.editor.toPlainText()
-        html = markdown2.markdown(content)
-        template = f"""
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <script src="https://polyfill.io/v3/polyfill.min.js?features=es6"></script>
-            <script type="text/javascript" id="MathJax-script" async
-              src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js">
-            </script>
-        </head>
-        <body>{html}</body>
-        </html>
-        """
         path, _ = QFileDialog.getSaveFileName(self, "Export as PDF", f"{self.current_session.title}.pdf", "PDF Files (*.pdf)")
         if path:
-            def on_pdf_ready(success):
-                if success:
-                    QMessageBox.information(self, "Exported", f"Notebook exported as PDF:\n{path}")
-                else:
-                    QMessageBox.warning(self, "Error", "Failed to generate PDF.")
-            self.viewer.setHtml(template)
-            self.viewer.page().pdfPrintingFinished.connect(on_pdf_ready)
-            self.viewer.page().printToPdf(path)
+            # Printed once the page has loaded and MathJax has typeset it
+            self.pdf_path = path
+            self.pdf_waited = None
+            self.preview.show(self.editor.toPlainText(), self.current_session.title)
+
+    def on_viewer_loaded(self, ok):
+        # One wait per export, whatever earlier loads finish in between
+        if ok and self.pdf_path and self.pdf_waited is None:
+            self.pdf_waited = 0
+            self.print_when_typeset()
+
+    def print_when_typeset(self):
+        def on_ready(ready):
+            if not self.pdf_path:
+                return
+            if ready or self.pdf_waited >= PDF_TYPESET_TIMEOUT_MS:
+                path, self.pdf_path = self.pdf_path, None
+                self.viewer.page().printToPdf(path)
+            else:
+                self.pdf_waited += PDF_POLL_MS
+                QTimer.singleShot(PDF_POLL_MS, self.print_when_typeset)
+        self.viewer.page().runJavaScript("window.mathjaxReady === true", 0, on_ready)
+
+    def on_pdf_ready(self, path, success):
+        if success:
+            QMessageBox.information(self, "Exported", f"Notebook exported as PDF:\n{path}")
+        else:
+            QMessageBox.warning(self, "Error", "Failed to generate PDF.")
 
     def export_markdown(self):
         if not self.current_session:
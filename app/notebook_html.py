@@ -0,0 +1,214 @@
+# app/notebook_html.py
+"""HTML pages for notebooks, shared by the preview and the HTML/PDF exports.
+
+MathJax is served from a local copy in app/assets/mathjax (installed by
+scripts/fetch_mathjax.py, which the Dockerfile runs): pages shown in the
+viewer are loaded with that directory as their base URL, so they render
+without any network access. Without a local copy they fall back to the CDN.
+
+A page holds the notebook as one <div class="block"> per top-level
+markdown block. The live preview keeps the page and, as the text changes,
+replaces only the blocks that differ and typesets only those.
+"""
+import json
+import logging
+import os
+from collections import OrderedDict
+from functools import lru_cache
+from html import escape
+from string import Template
+
+import markdown2
+from PySide6.QtCore import QObject, QUrl
+
+from markdown_blocks import block_source, link_definitions, split_markdown_blocks
+from mathjax_assets import ASSETS_DIR, MATHJAX_CDN, MATHJAX_SCRIPT
+
+logger = logging.getLogger(__name__)
+
+BLOCK_CACHE_SIZE = 2048
+
+# window.mathjaxReady turns true once the first typeset is done.
+# notebookPatch(generation, start, count, htmls) swaps count blocks from
+# start for new ones and typesets just those, queued behind any typeset
+# still running; it returns false if the page is not that generation.
+PAGE_TEMPLATE = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+<script>
+window.MathJax = {
+  startup: {
+    pageReady: () => MathJax.startup.defaultPageReady().then(() => { window.mathjaxReady = true; })
+  }
+};
+window.notebookGeneration = $generation;
+window.notebookPatch = function (generation, start, count, htmls) {
+  if (generation !== window.notebookGeneration) {
+    return false;
+  }
+  const root = document.getElementById("notebook");
+  const removed = Array.from(root.children).slice(start, start + count);
+  const anchor = root.children[start + count] || null;
+  const typesetting = window.MathJax && MathJax.startup && MathJax.startup.promise;
+  if (typesetting && removed.length) {
+    MathJax.typesetClear(removed);
+  }
+  removed.forEach((node) => node.remove());
+  const added = htmls.map((html) => {
+    const node = document.createElement("div");
+    node.className = "block";
+    node.innerHTML = html;
+    root.insertBefore(node, anchor);
+    return node;
+  });
+  // Before MathJax has started up, its first typeset covers the new blocks
+  if (typesetting && added.length) {
+    MathJax.startup.promise = MathJax.startup.promise
+      .then(() => MathJax.typesetPromise(added))
+      .catch((err) => console.error(err));
+  }
+  return true;
+};
+</script>
+<script id="MathJax-script" async src="$mathjax"></script>
+</head>
+<body>
+<div id="notebook">
+$body
+</div>
+</body>
+</html>
+""")
+
+@lru_cache(maxsize=1)
+def has_local_mathjax():
+    found = os.path.isfile(os.path.join(ASSETS_DIR, MATHJAX_SCRIPT))
+    if not found:
+        logger.warning("No local MathJax in %s, notebooks load it from %s "
+                       "(run scripts/fetch_mathjax.py)", ASSETS_DIR, MATHJAX_CDN)
+    return found
+
+
+def base_url():
+    """Base URL to pass to QWebEngineView.setHtml with a page."""
+    return QUrl.fromLocalFile(ASSETS_DIR + os.sep)
+
+
+class NotebookRenderer:
+    """Markdown to HTML one block at a time, with an LRU of rendered blocks.
+
+    A block is keyed by its text and the document's link definitions, so
+    editing one block never re-renders the others.
+    """
+
+    def __init__(self, capacity=BLOCK_CACHE_SIZE):
+        self.capacity = capacity
+        self.html = OrderedDict()
+
+    def blocks(self, content):
+        """The content's blocks as (text, link definitions) keys."""
+        definitions = link_definitions(content)
+        return [(block, definitions) for block in split_markdown_blocks(content)]
+
+    def block_html(self, key):
+        html = self.html.get(key)
+        if html is None:
+            source = block_source(*key)
+            html = markdown2.markdown(source) if source else ""
+            self.html[key] = html
+            if len(self.html) > self.capacity:
+                self.html.popitem(last=False)
+        else:
+            self.html.move_to_end(key)
+        return html
+
+    def page(self, keys, title="", portable=False, generation=0):
+        """A complete HTML page of the given blocks.
+
+        Portable pages, written out as files, always load MathJax from the
+        CDN; the others expect base_url() and use the local copy if present.
+        """
+        mathjax = MATHJAX_SCRIPT if not portable and has_local_mathjax() else MATHJAX_CDN
+        body = "\n".join(f'<div class="block">{self.block_html(key)}</div>' for key in keys)
+        return PAGE_TEMPLATE.substitute(title=escape(title), mathjax=mathjax, body=body, generation=generation)
+
+
+_renderer = NotebookRenderer()
+
+
+def notebook_page(content, title="", portable=False):
+    """A notebook's markdown as a complete HTML page."""
+    return _renderer.page(_renderer.blocks(content), title, portable)
+
+
+def block_patch(old, new):
+    """(start, count, new_keys): replace old[start:start + count] with new_keys."""
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and old[start] == new[start]:
+        start += 1
+    end = 0
+    while end < limit - start and old[-1 - end] == new[-1 - end]:
+        end += 1
+    return start, len(old) - start - end, new[start:len(new) - end]
+
+
+class NotebookPreview(QObject):
+    """Keeps a QWebEngineView showing a notebook, patching it as it changes.
+
+    show() loads a whole page; update() then replaces only the changed
+    blocks in place through runJavaScript, which leaves the scroll position
+    alone. Updates that arrive while a page loads wait for it to finish, and
+    a patch the page turns down reloads it whole.
+    """
+
+    def __init__(self, view, parent=None):
+        super().__init__(parent)
+        self.view = view
+        self.renderer = _renderer
+        self.keys = []
+        self.content = ""
+        self.title = ""
+        self.generation = 0
+        self.loading = False
+        self.pending = None
+        view.loadFinished.connect(self.on_load_finished)
+
+    def show(self, content, title=""):
+        self.content = content
+        self.title = title
+        self.keys = self.renderer.blocks(content)
+        self.generation += 1
+        self.loading = True
+        self.pending = None
+        self.view.setHtml(self.renderer.page(self.keys, title, generation=self.generation), base_url())
+
+    def clear(self):
+        self.show("")
+
+    def update(self, content):
+        if self.loading:
+            self.pending = content
+            return
+        self.content = content
+        keys = self.renderer.blocks(content)
+        start, count, added = block_patch(self.keys, keys)
+        if not count and not added:
+            return
+        self.keys = keys
+        htmls = json.dumps([self.renderer.block_html(key) for key in added])
+        script = f"window.notebookPatch ? notebookPatch({self.generation}, {start}, {count}, {htmls}) : false"
+        self.view.page().runJavaScript(script, 0, self.on_patched)
+
+    def on_patched(self, applied):
+        if applied is not True and not self.loading:
+            logger.info("Preview patch not applied, reloading the page")
+            self.show(self.content, self.title)
+
+    def on_load_finished(self, ok):
+        self.loading = False
+        if self.pending is not None:
+            content, self.pending = self.pending, None
+            self.update(content)
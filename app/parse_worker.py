@@ -0,0 +1,132 @@
+# app/parse_worker.py
+import os
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from myiq.assistant import index_attachment, parse_attachment
+
+
+class ParseSignals(QObject):
+    finished = Signal(str, str, str, bool)
+    failed = Signal(str, str)
+    exited = Signal(object)
+
+
+class ParseJob(QRunnable):
+    def __init__(self, path, cancel_event):
+        super().__init__()
+        self.path = path
+        self.cancel_event = cancel_event
+        self.signals = ParseSignals()
+
+    def run(self):
+        try:
+            self.parse()
+        finally:
+            self.signals.exited.emit(self)
+
+    def parse(self):
+        if self.cancel_event.is_set():
+            return
+        try:
+            cache_key, content = parse_attachment(self.path, self.cancel_event)
+        except Exception as e:
+            if not self.cancel_event.is_set():
+                self.signals.failed.emit(self.path, str(e))
+            return
+        if self.cancel_event.is_set():
+            return
+        # Embedding goes on in the background; the attachment is sendable now
+        indexed = index_attachment(cache_key, content, self.path)
+        self.signals.finished.emit(self.path, cache_key, content, indexed)
+
+
+class AttachmentParser(QObject):
+    """Parses attachments on a thread pool so the GUI thread never blocks.
+
+    Tesseract runs as an external process and pdfplumber spends much of its
+    time in I/O, so one pool thread per core keeps several files parsing in
+    parallel. Cancelling takes queued jobs off the pool; running ones stop
+    at their next checkpoint (between PDF page batches) and their results
+    are discarded.
+    """
+
+    parsed = Signal(dict)
+    failed = Signal(str, str)
+    progress = Signal(int, int)
+    idle = Signal()
+
+    def __init__(self, parent=None, max_workers=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers or os.cpu_count() or 2)
+        self.cancel_event = threading.Event()
+        self.jobs = {}
+        # Every started job, cancelled or not, stays referenced until it exits
+        self.live = set()
+        self.done = 0
+        self.total = 0
+
+    def is_busy(self):
+        return bool(self.jobs)
+
+    def pending_names(self):
+        return [os.path.basename(path) for path in self.jobs]
+
+    def submit(self, paths):
+        for path in paths:
+            if path in self.jobs:
+                continue
+            job = ParseJob(path, self.cancel_event)
+            job.setAutoDelete(False)
+            job.signals.finished.connect(self.on_finished)
+            job.signals.failed.connect(self.on_failed)
+            job.signals.exited.connect(self.live.discard)
+            self.jobs[path] = job
+            self.live.add(job)
+            self.total += 1
+            self.pool.start(job)
+        self.progress.emit(self.done, self.total)
+
+    def cancel(self):
+        # Running jobs see the event and drop their result; a fresh event
+        # keeps later submissions unaffected
+        self.cancel_event.set()
+        self.cancel_event = threading.Event()
+        # tryTake rather than clear(): a job it removes will never run, so
+        # its reference can go; the others still exit on their own
+        for job in list(self.jobs.values()):
+            if self.pool.tryTake(job):
+                self.live.discard(job)
+        self.jobs.clear()
+        self.done = self.total = 0
+        self.idle.emit()
+
+    def on_finished(self, path, cache_key, content, indexed):
+        # Results queued before a cancel may still arrive afterwards
+        if path not in self.jobs:
+            return
+        self.parsed.emit({
+            'name': os.path.basename(path),
+            'path': path,
+            'cache_key': cache_key,
+            'content': content,
+            'indexed': indexed
+        })
+        self.job_done(path)
+
+    def on_failed(self, path, error):
+        if path not in self.jobs:
+            return
+        self.failed.emit(path, error)
+        self.job_done(path)
+
+    def job_done(self, path):
+        if self.jobs.pop(path, None) is None:
+            return
+        self.done += 1
+        self.progress.emit(self.done, self.total)
+        if not self.jobs:
+            self.done = self.total = 0
+            self.idle.emit()
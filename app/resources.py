@@ -0,0 +1,54 @@
+# app/resources.py
+"""Icons, pixmaps and stylesheets, each loaded once per process.
+
+Files are read from the compiled Qt resource module when it is present
+(pyside6-rcc app/resources.qrc -o app/resources_rc.py, done by the
+Dockerfile) and otherwise from the source tree, so neither depends on the
+current working directory.
+"""
+import os
+from functools import lru_cache
+
+from PySide6.QtCore import QFile, QIODevice
+from PySide6.QtGui import QIcon, QPixmap
+
+try:
+    import resources_rc  # noqa: F401  registers the ":/" resources
+except ImportError:
+    resources_rc = None
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(APP_DIR)
+# Resource name prefix -> source directory
+SOURCE_DIRS = {
+    "icons": os.path.join(ROOT, "icons"),
+    "styles": os.path.join(APP_DIR, "styles"),
+}
+
+
+def resource_path(kind, name):
+    if resources_rc is not None:
+        return f":/{kind}/{name}"
+    return os.path.join(SOURCE_DIRS[kind], name)
+
+
+@lru_cache(maxsize=None)
+def icon(name):
+    return QIcon(resource_path("icons", name))
+
+
+@lru_cache(maxsize=None)
+def pixmap(name, size):
+    """The icon rasterized at size x size; share it, never paint into it."""
+    return icon(name).pixmap(size, size)
+
+
+@lru_cache(maxsize=None)
+def stylesheet(name):
+    f = QFile(resource_path("styles", name))
+    if not f.open(QIODevice.ReadOnly | QIODevice.Text):
+        raise FileNotFoundError(f"stylesheet not found: {name}")
+    try:
+        return bytes(f.readAll()).decode("utf-8")
+    finally:
+        f.close()
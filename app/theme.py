@@ -0,0 +1,130 @@
+# app/theme.py
+"""Light and dark themes, applied once for the whole application.
+
+A theme is a table of named colors. It fills the ${name} placeholders of the
+one application stylesheet, app.qss, and builds the QPalette that unstyled
+widgets and dialogs draw with. Pages and widgets carry object names for the
+stylesheet to select on instead of setting stylesheets of their own, so Qt
+parses a single sheet and polishes each widget once.
+"""
+import os
+from functools import lru_cache
+from string import Template
+
+from PySide6.QtGui import QColor, QPalette
+
+from resources import stylesheet
+
+THEMES = {
+    "light": {
+        "background": "#FFFFFF",
+        "surface": "#F7F7F8",
+        "list": "#FAFAFA",
+        "text": "#333333",
+        "heading": "#111111",
+        "muted": "#666666",
+        "border": "#E5E7EB",
+        "selection": "#D0E7FF",
+        "selection_text": "#0B60D8",
+        "accent": "#0078D4",
+        "accent_hover": "#005EA6",
+        "accent_pressed": "#004477",
+        "on_accent": "#FFFFFF",
+        "scrollbar": "#A3BFFA",
+        "nav_hover": "#EAEAEA",
+        "nav_checked": "#DCDCDC",
+        "section_checked": "#D0D0D0",
+        # Chat transcript
+        "sender": "#555555",
+        "user_bubble": "#E6F0FF",
+        "user_bubble_border": "#105384",
+        "bot_bubble": "#FFFFFF",
+        "bot_bubble_border": "#DADCE0",
+        "bubble_text": "#202123",
+        "code_background": "#F3F4F6",
+    },
+    "dark": {
+        "background": "#202124",
+        "surface": "#2A2B2E",
+        "list": "#26272A",
+        "text": "#E3E3E3",
+        "heading": "#F5F5F5",
+        "muted": "#A0A0A0",
+        "border": "#3C3D41",
+        "selection": "#1F3B5C",
+        "selection_text": "#8AB4F8",
+        "accent": "#3B8EEA",
+        "accent_hover": "#5AA0EE",
+        "accent_pressed": "#2C6FB8",
+        "on_accent": "#FFFFFF",
+        "scrollbar": "#5A6B8C",
+        "nav_hover": "#34353A",
+        "nav_checked": "#3E3F44",
+        "section_checked": "#44464B",
+        "sender": "#A0A0A0",
+        "user_bubble": "#1F3B5C",
+        "user_bubble_border": "#3B6EA5",
+        "bot_bubble": "#2A2B2E",
+        "bot_bubble_border": "#3C3D41",
+        "bubble_text": "#E3E3E3",
+        "code_background": "#1B1C1F",
+    },
+}
+DEFAULT_THEME = os.environ.get("MYIQ_THEME", "light")
+
+_current = DEFAULT_THEME if DEFAULT_THEME in THEMES else "light"
+
+
+def current_theme():
+    return _current
+
+
+def color(name):
+    return QColor(THEMES[_current][name])
+
+
+@lru_cache(maxsize=None)
+def compiled_stylesheet(name):
+    return Template(stylesheet("app.qss")).substitute(THEMES[name])
+
+
+def palette(name):
+    colors = {key: QColor(value) for key, value in THEMES[name].items()}
+    p = QPalette()
+    for role, key in [
+        (QPalette.Window, "background"),
+        (QPalette.WindowText, "text"),
+        (QPalette.Base, "background"),
+        (QPalette.AlternateBase, "surface"),
+        (QPalette.Text, "text"),
+        (QPalette.Button, "surface"),
+        (QPalette.ButtonText, "text"),
+        (QPalette.BrightText, "heading"),
+        (QPalette.ToolTipBase, "surface"),
+        (QPalette.ToolTipText, "text"),
+        (QPalette.PlaceholderText, "muted"),
+        (QPalette.Highlight, "selection"),
+        (QPalette.HighlightedText, "selection_text"),
+        (QPalette.Link, "accent"),
+        (QPalette.Mid, "border"),
+    ]:
+        p.setColor(role, colors[key])
+    p.setColor(QPalette.Disabled, QPalette.Text, colors["muted"])
+    p.setColor(QPalette.Disabled, QPalette.ButtonText, colors["muted"])
+    p.setColor(QPalette.Disabled, QPalette.WindowText, colors["muted"])
+    return p
+
+
+def apply_theme(app, name=None):
+    """Set the palette and the one application stylesheet.
+
+    Widgets that paint themselves (the chat transcript) pick up the new
+    colors on the style change that follows.
+    """
+    global _current
+    name = name or _current
+    if name not in THEMES:
+        raise ValueError(f"unknown theme: {name}")
+    _current = name
+    app.setPalette(palette(name))
+    app.setStyleSheet(compiled_stylesheet(name))
@@ -1,11 +1,20 @@
 # app/voice_trigger.py
-import speech_recognition as sr
 import threading
-from chat_handler import get_llm_response
+from myiq.scheduler import get_scheduler
 
 TRIGGER_WORD = "myiq"
 
+def ask(command):
+    # Queued with the chat replies so voice never oversubscribes Ollama
+    request = get_scheduler().submit(lambda r: r.generate(command), owner="voice")
+    request.wait()
+    if request.error is not None:
+        return f"[Error talking to LLM: {request.error}]"
+    return request.result
+
 def listen_loop():
+    # Only loaded once voice is switched on
+    import speech_recognition as sr
     recognizer = sr.Recognizer()
     mic = sr.Microphone()
 
@@ -23,7 +32,7 @@ def listen_loop():
                     audio = recognizer.listen(source)
                     command = recognizer.recognize_whisper(audio)
                     print(f">> You said: {command}")
-                    response = get_llm_response(command)
+                    response = ask(command)
                     print(f"<< MyIQ: {response}")
         except Exception as e:
             print(f"[Voice error: {e}]")
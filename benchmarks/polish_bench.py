@@ -0,0 +1,116 @@
+# benchmarks/polish_bench.py
+"""Stylesheet polish benchmark for the desktop app.
+
+Builds the main window with every page and a 1,000-message chat
+transcript, then times applying the theme until the window has repainted:
+
+  per-page     the stylesheet set on each page's top-level widget, as the
+               pages used to do, so Qt parses it once per page
+  application  the one compiled stylesheet set on the QApplication
+  switch       changing the application theme from light to dark, which
+               also lays the visible transcript markdown out again
+
+Reports the median over several runs. App data is written to a temporary
+directory.
+
+    python benchmarks/polish_bench.py --runs 10
+    QT_QPA_PLATFORM=offscreen python benchmarks/polish_bench.py   # headless
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "app"), ROOT]
+
+from PySide6.QtWidgets import QAbstractItemView, QApplication, QWidget
+
+LOREM = (
+    "Here is what I found in the document. The **revenue** grew by 12% while costs "
+    "stayed flat, mostly thanks to the new supplier contract.\n\n"
+    "- margins improved in Q3\n- headcount is unchanged\n\n"
+    "```python\ntotal = sum(row.amount for row in rows)\n```"
+)
+
+
+def build_window(messages):
+    from main import MainApp, PAGES
+    from myiq.sessions import ChatSession
+
+    window = MainApp()
+    pages = [window.page(index) for index in range(len(PAGES))]
+    chat = pages[0]
+    session = ChatSession()
+    for n in range(messages):
+        session.add_message(f"Question {n}: what changed?" if n % 2 == 0 else LOREM, is_user=n % 2 == 0)
+    chat.current_session = session
+    chat.load_chat_history()
+    window.resize(1200, 800)
+    window.show()
+    return window, pages
+
+
+def settle(app, window):
+    app.processEvents()
+    # Layouts that were only scheduled count too
+    for view in window.findChildren(QAbstractItemView):
+        view.executeDelayedItemsLayout()
+    window.grab()
+
+
+def measure(app, window, reset, apply, runs):
+    times = []
+    for _ in range(runs):
+        reset()
+        settle(app, window)
+        started = time.perf_counter()
+        apply()
+        settle(app, window)
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=1000)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="myiq-polish-"))
+    app = QApplication(sys.argv)
+    from theme import apply_theme, compiled_stylesheet, palette
+
+    apply_theme(app, "light")
+    window, pages = build_window(args.messages)
+    sheet = compiled_stylesheet("light")
+
+    def clear():
+        app.setStyleSheet("")
+        for page in pages:
+            page.setStyleSheet("")
+
+    def per_page():
+        app.setPalette(palette("light"))
+        for page in pages:
+            page.setStyleSheet(sheet)
+
+    results = {
+        "per-page": measure(app, window, clear, per_page, args.runs),
+        "application": measure(app, window, clear, lambda: apply_theme(app, "light"), args.runs),
+        "switch": measure(
+            app, window, lambda: apply_theme(app, "light"), lambda: apply_theme(app, "dark"), args.runs
+        ),
+    }
+
+    widgets = len(window.findChildren(QWidget))
+    print(f"runs: {args.runs}   transcript: {args.messages} messages   widgets: {widgets}")
+    for name, times in results.items():
+        print(f"{name:12} median {statistics.median(times):8.1f} ms   "
+              f"min {min(times):8.1f} ms   max {max(times):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/startup_bench.py
+"""Cold-start benchmark for the desktop app.
+
+Launches app/main.py several times with MYIQ_STARTUP_BENCH=1, which makes
+it print the time to its first paint and quit, and with -X importtime to
+attribute import cost. Reports the median wall time and first paint, and
+the slowest top-level imports of the median run.
+
+    python benchmarks/startup_bench.py --runs 5
+    QT_QPA_PLATFORM=offscreen python benchmarks/startup_bench.py   # headless
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "app", "main.py")
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+FIRST_PAINT = re.compile(r"first paint: ([\d.]+) ms")
+
+
+def run_once():
+    env = dict(os.environ, MYIQ_STARTUP_BENCH="1")
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", MAIN],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120,
+    )
+    wall = (time.perf_counter() - started) * 1000
+    match = FIRST_PAINT.search(result.stdout)
+    if not match:
+        raise RuntimeError(f"app did not report a first paint:\n{result.stdout}\n{result.stderr[-2000:]}")
+    return {'wall_ms': wall, 'paint_ms': float(match.group(1)), 'imports': parse_importtime(result.stderr)}
+
+
+def parse_importtime(stderr):
+    """Cumulative milliseconds per top-level import, from -X importtime output."""
+    imports = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        # Top-level imports are the least indented (one space after the bar)
+        if match and len(match.group(3)) == 1:
+            imports.append((int(match.group(2)) / 1000, match.group(4)))
+    return sorted(imports, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="number of imports to list")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    runs.sort(key=lambda r: r['paint_ms'])
+    median = runs[len(runs) // 2]
+
+    print(f"runs: {args.runs}")
+    print(f"first paint  median {median['paint_ms']:8.1f} ms   "
+          f"min {runs[0]['paint_ms']:8.1f} ms   max {runs[-1]['paint_ms']:8.1f} ms")
+    print(f"process wall median {statistics.median(r['wall_ms'] for r in runs):8.1f} ms")
+    print(f"\nslowest top-level imports (median run, cumulative):")
+    for ms, name in median['imports'][:args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+"""MyIQ core: chat sessions, storage, parsing, retrieval, prompt building
+and the Ollama client, with no Qt dependency. The desktop app in app/ and
+the batch CLI (python -m myiq) are both built on it."""
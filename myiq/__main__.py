@@ -0,0 +1,6 @@
+# myiq/__main__.py
+import sys
+
+from .cli import main
+
+sys.exit(main())
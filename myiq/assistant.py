@@ -0,0 +1,96 @@
+# myiq/assistant.py
+import logging
+import os
+
+from .file_parser import is_parse_error
+from .parse_cache import get_parse_cache
+from .prompt_builder import PromptBuilder
+
+logger = logging.getLogger(__name__)
+
+ATTACHMENT_PREVIEW_CHARS = 1000
+ATTACHMENT_ONLY_PROMPT = "Summarize the attached documents."
+
+
+def parse_attachment(path, cancel=None):
+    """Return (cache_key, text) for a file, parsed in full for retrieval.
+
+    Setting the cancel event stops the parse with ParseCancelled.
+    """
+    # Imported on first use: numpy and the parsers are slow to load at startup
+    from .retrieval import DOCUMENT_MAX_CHARS
+    return get_parse_cache().parse(path, DOCUMENT_MAX_CHARS, cancel)
+
+
+def index_attachment(cache_key, content, path=""):
+    """Start embedding a parsed attachment's chunks in the background.
+
+    Returns False if the attachment can only be previewed. The prompt for a
+    question waits for the indexing to finish; see attachment_context.
+    """
+    # Without an index the prompt falls back to the start of the document
+    if is_parse_error(content):
+        return False
+    from .retrieval import get_retriever
+    get_retriever().index_in_background(cache_key, content, path)
+    return True
+
+
+def load_attachment(path):
+    """Parse a file and start indexing it, returning the attachment dict prompts take."""
+    cache_key, content = parse_attachment(path)
+    return {
+        'name': os.path.basename(path),
+        'path': path,
+        'cache_key': cache_key,
+        'content': content,
+        'indexed': index_attachment(cache_key, content, path)
+    }
+
+
+def attachment_context(question, attachments):
+    """Only the chunks most relevant to the question, not whole documents.
+
+    Waits for attachments still being indexed; those whose indexing failed
+    are sent as previews.
+    """
+    indexed = [a for a in attachments if a.get('indexed')]
+    excerpts = []
+    if indexed:
+        from .retrieval import get_retriever
+        retriever = get_retriever()
+        indexed = [a for a in indexed if retriever.wait_indexed(a['cache_key'])]
+    if indexed:
+        names = {a['cache_key']: a['name'] for a in indexed}
+        try:
+            hits = retriever.retrieve(question, list(names))
+            excerpts = [f"[{names[doc_id]}, excerpt {n + 1}]\n{text}" for _, doc_id, n, text in hits]
+        except Exception as e:
+            logger.warning("Retrieval failed, sending document previews: %s", e)
+            indexed = []
+    for a in attachments:
+        if a not in indexed:
+            excerpts.append(f"[{a['name']}]\n{a['content'][:ATTACHMENT_PREVIEW_CHARS]}")
+    return "\n\n".join(excerpts)
+
+
+def prepare_messages(question, history=(), attachments=(), first_seq=0, summary="", summary_upto=0,
+                     load_turns=None):
+    """Return (messages, summary, summary_upto) for a question and its context.
+
+    history holds the turns before the question, history[0] having sequence
+    number first_seq; load_turns(start, end) reads turns that were not
+    loaded. See PromptBuilder.build.
+    """
+    question = question or ATTACHMENT_ONLY_PROMPT
+    context = attachment_context(question, attachments) if attachments else ""
+    return PromptBuilder().build(
+        question,
+        list(history),
+        first_seq=first_seq,
+        context=context,
+        summary=summary,
+        summary_upto=summary_upto,
+        load_turns=load_turns,
+    )
+
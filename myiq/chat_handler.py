@@ -0,0 +1,170 @@
+# myiq/chat_handler.py
+import json
+import logging
+import os
+import socket
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+if "://" not in OLLAMA_HOST:
+    OLLAMA_HOST = f"http://{OLLAMA_HOST}"
+MODEL = "llama3.2:latest"
+
+CONNECT_TIMEOUT = float(os.environ.get("MYIQ_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("MYIQ_READ_TIMEOUT", "120"))
+MAX_RETRIES = int(os.environ.get("MYIQ_MAX_RETRIES", "3"))
+LOG_PROMPTS = os.environ.get("MYIQ_LOG_PROMPTS", "0") == "1"
+# Ollama silently truncates prompts longer than its (small) default window.
+# Every request sends the same num_ctx: a different value reloads the model.
+CONTEXT_WINDOW = int(os.environ.get("MYIQ_NUM_CTX", "8192"))
+# How long Ollama keeps the model (and its KV cache) loaded after a request
+KEEP_ALIVE = os.environ.get("MYIQ_KEEP_ALIVE", "30m")
+
+
+class OllamaClient:
+    """Shared keep-alive HTTP client for the Ollama API.
+
+    Connections are pooled by a single requests.Session. Connection failures
+    and 502/503/504 answers are retried with exponential backoff; reads are
+    never retried so a half-streamed answer is not generated twice.
+    """
+
+    def __init__(self, host=OLLAMA_HOST, model=MODEL,
+                 connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 max_retries=MAX_RETRIES, backoff_factor=0.5,
+                 log_prompts=LOG_PROMPTS, pool_size=4,
+                 context_window=CONTEXT_WINDOW, keep_alive=KEEP_ALIVE):
+        self.base_url = host.rstrip("/")
+        self.model = model
+        self.context_window = context_window
+        self.keep_alive = keep_alive
+        self.timeout = (connect_timeout, read_timeout)
+        self.log_prompts = log_prompts
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, path):
+        return f"{self.base_url}{path}"
+
+    def post(self, path, payload, stream=False):
+        response = self.session.post(self.url(path), json=payload, stream=stream, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def log_prompt(self, prompt):
+        if self.log_prompts:
+            logger.debug("Sending prompt (%d chars): %s", len(prompt), prompt)
+
+    def log_response(self, text):
+        if self.log_prompts:
+            logger.debug("Response (%d chars): %s", len(text), text)
+
+    def generate(self, prompt):
+        self.log_prompt(prompt)
+        payload = self.payload(prompt=prompt, stream=False)
+        text = self.post("/api/generate", payload).json().get("response", "").strip()
+        self.log_response(text)
+        return text
+
+    def payload(self, **fields):
+        return {
+            "model": self.model,
+            "keep_alive": self.keep_alive,
+            **fields,
+            "options": {"num_ctx": self.context_window, **fields.get("options", {})}
+        }
+
+    def chat_payload(self, messages, stream):
+        return self.payload(messages=messages, stream=stream)
+
+    def warm_up(self, messages=None):
+        """Load the model and, given messages, pre-evaluate them as a cached prefix.
+
+        Ollama reuses the KV cache for the longest common prefix of the next
+        prompt, so warming up with the system prompt makes the first real
+        question pay only for its own tokens.
+        """
+        payload = self.payload(messages=messages or [], stream=False)
+        if messages:
+            payload["options"]["num_predict"] = 1
+        started = time.perf_counter()
+        self.post("/api/chat", payload)
+        logger.info("Model %s warmed up in %.1fs", self.model, time.perf_counter() - started)
+
+    def log_messages(self, messages):
+        if self.log_prompts:
+            for message in messages:
+                self.log_prompt(f"[{message['role']}] {message['content']}")
+
+    def chat(self, messages):
+        self.log_messages(messages)
+        response = self.post("/api/chat", self.chat_payload(messages, False)).json()
+        text = response.get("message", {}).get("content", "").strip()
+        self.log_response(text)
+        return text
+
+    def stream_chat(self, messages, on_open=None):
+        """Yield assistant text pieces from a streamed /api/chat call.
+
+        on_open(response) is called before reading, so another thread can
+        abort() the stream.
+        """
+        self.log_messages(messages)
+        with self.post("/api/chat", self.chat_payload(messages, True), stream=True) as response:
+            if on_open:
+                on_open(response)
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(chunk["error"])
+                text = chunk.get("message", {}).get("content", "")
+                if text:
+                    yield text
+                if chunk.get("done"):
+                    break
+
+    @staticmethod
+    def abort(response):
+        """Close a streaming response, waking a thread blocked reading it."""
+        # Closing alone waits for the next chunk; shutting the socket down
+        # ends the read now and tells Ollama to stop generating
+        sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        response.close()
+
+    def close(self):
+        self.session.close()
+
+
+client = OllamaClient()
+
+
+def warm_up(messages=None):
+    try:
+        client.warm_up(messages)
+    except Exception as e:
+        logger.info("Model warm-up skipped: %s", e)
@@ -0,0 +1,234 @@
+# myiq/chat_store.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Schema upgrades applied in order; PRAGMA user_version records how many ran
+MIGRATIONS = [
+    """
+    ALTER TABLE sessions ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0;
+    UPDATE sessions SET message_count = (
+        SELECT COUNT(*) FROM messages WHERE messages.session_id = sessions.session_id
+    );
+    CREATE INDEX IF NOT EXISTS sessions_by_updated ON sessions (updated_at DESC);
+    """,
+    """
+    ALTER TABLE sessions ADD COLUMN summary TEXT NOT NULL DEFAULT '';
+    ALTER TABLE sessions ADD COLUMN summary_upto INTEGER NOT NULL DEFAULT 0;
+    """,
+]
+
+COMPACT_INTERVAL = 300
+COMPACT_AFTER_WRITES = 200
+
+
+class ChatStore:
+    """Append-only chat history stored in SQLite (WAL mode).
+
+    Every session is a log of messages keyed by (session_id, seq). Saving a
+    reply inserts only the new rows in a single transaction, so the cost does
+    not depend on how much history exists and an interrupted write never
+    touches other sessions. A background thread checkpoints the WAL and
+    reclaims pages freed by deleted sessions.
+    """
+
+    def __init__(self, db_path, compact_interval=COMPACT_INTERVAL):
+        self.db_path = db_path
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.pending_writes = 0
+
+        self.migrate()
+
+        self.closed = False
+        self.wake = threading.Event()
+        self.compactor = threading.Thread(
+            target=self.compact_loop, args=(compact_interval,), daemon=True
+        )
+        self.compactor.start()
+
+    def connect(self):
+        # sqlite3 connections are not shared between threads, keep one per thread
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            # auto_vacuum only takes effect when set before the first table exists
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def migrate(self):
+        conn = self.connect()
+        conn.executescript(SCHEMA)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for i, script in enumerate(MIGRATIONS[version:], start=version + 1):
+            conn.executescript(f"BEGIN; {script} PRAGMA user_version = {i}; COMMIT;")
+
+    def save_session(self, session_id, title, created_at, updated_at, new_messages, first_seq,
+                     summary="", summary_upto=0):
+        conn = self.connect()
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO sessions (session_id, title, created_at, updated_at, message_count,
+                                      summary, summary_upto)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    title = excluded.title,
+                    updated_at = excluded.updated_at,
+                    message_count = MAX(message_count, excluded.message_count),
+                    summary = excluded.summary,
+                    summary_upto = excluded.summary_upto
+                """,
+                (session_id, title, created_at, updated_at, first_seq + len(new_messages),
+                 summary, summary_upto),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO messages (session_id, seq, message) VALUES (?, ?, ?)",
+                [
+                    (session_id, first_seq + i, json.dumps(message, ensure_ascii=False))
+                    for i, message in enumerate(new_messages)
+                ],
+            )
+        self.note_writes(1)
+
+    def rename_session(self, session_id, title):
+        conn = self.connect()
+        with conn:
+            conn.execute("UPDATE sessions SET title = ? WHERE session_id = ?", (title, session_id))
+
+    def get_session(self, session_id):
+        """Session metadata without any message bodies."""
+        row = self.connect().execute(
+            "SELECT * FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def load_messages(self, session_id, start=0, end=None):
+        """Messages with start <= seq < end, in order."""
+        query = "SELECT message FROM messages WHERE session_id = ? AND seq >= ?"
+        params = [session_id, start]
+        if end is not None:
+            query += " AND seq < ?"
+            params.append(end)
+        rows = self.connect().execute(query + " ORDER BY seq", params)
+        return [json.loads(r['message']) for r in rows]
+
+    def load_session(self, session_id):
+        data = self.get_session(session_id)
+        if data is not None:
+            data['messages'] = self.load_messages(session_id)
+        return data
+
+    def list_sessions(self):
+        # Served from the sessions table and its updated_at index alone
+        rows = self.connect().execute(
+            """
+            SELECT session_id, title, created_at, updated_at, message_count
+            FROM sessions ORDER BY updated_at DESC
+            """
+        )
+        return [dict(r) for r in rows]
+
+    def delete_session(self, session_id):
+        conn = self.connect()
+        with conn:
+            conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        self.note_writes(COMPACT_AFTER_WRITES)
+
+    def import_legacy(self, sessions_file):
+        """One-time import of the old whole-file sessions.json format."""
+        conn = self.connect()
+        done = conn.execute("SELECT value FROM meta WHERE key = 'legacy_imported'").fetchone()
+        if done or not os.path.exists(sessions_file):
+            return
+        try:
+            with open(sessions_file, 'r', encoding='utf-8') as f:
+                sessions = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning("Could not import %s: %s", sessions_file, e)
+            sessions = {}
+
+        with conn:
+            for data in sessions.values():
+                conn.execute(
+                    """
+                    INSERT OR IGNORE INTO sessions (session_id, title, created_at, updated_at, message_count)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (data['session_id'], data['title'], data['created_at'],
+                     data['updated_at'], len(data['messages'])),
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO messages (session_id, seq, message) VALUES (?, ?, ?)",
+                    [
+                        (data['session_id'], seq, json.dumps(message, ensure_ascii=False))
+                        for seq, message in enumerate(data['messages'])
+                    ],
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_imported', ?)",
+                (sessions_file,),
+            )
+        logger.info("Imported %d sessions from %s", len(sessions), sessions_file)
+
+    def note_writes(self, count):
+        with self.lock:
+            self.pending_writes += count
+            if self.pending_writes >= COMPACT_AFTER_WRITES:
+                self.wake.set()
+
+    def compact(self):
+        """Fold the WAL back into the database and release free pages."""
+        conn = self.connect()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("PRAGMA incremental_vacuum").fetchall()
+        with self.lock:
+            self.pending_writes = 0
+
+    def compact_loop(self, interval):
+        while not self.closed:
+            self.wake.wait(interval)
+            self.wake.clear()
+            if self.closed:
+                break
+            if self.pending_writes:
+                try:
+                    self.compact()
+                except sqlite3.Error as e:
+                    logger.warning("Chat history compaction failed: %s", e)
+
+    def close(self):
+        self.closed = True
+        self.wake.set()
+        conn = getattr(self.local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
@@ -0,0 +1,134 @@
+# myiq/cli.py
+"""Headless batch jobs: python -m myiq {digest,prompts} ...
+
+digest   answers one prompt about every file in a directory
+prompts  answers each line of a JSONL file: {"prompt": ..., "files": [...], "id": ...}
+
+Results are written as JSON lines, in input order, to stdout or --output.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .assistant import ATTACHMENT_ONLY_PROMPT, load_attachment, prepare_messages
+from .file_parser import is_parse_error
+from .scheduler import BACKGROUND, get_scheduler
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 2
+
+
+def answer(prompt, files=()):
+    """Answer a prompt about files; returns a result record, never raises."""
+    started = time.perf_counter()
+    record = {'prompt': prompt, 'files': list(files)}
+    try:
+        attachments = [load_attachment(path) for path in files]
+        for a in attachments:
+            if is_parse_error(a['content']):
+                raise ValueError(f"{a['name']}: {a['content'].strip('[]')}")
+        messages, _, _ = prepare_messages(prompt, attachments=attachments)
+        # Parsing runs -j wide; the LLM calls share the scheduler's slots
+        request = get_scheduler().submit(lambda r: r.chat(messages), BACKGROUND, owner="cli")
+        request.wait()
+        if request.error is not None:
+            raise request.error
+        record['response'] = request.result
+        record['error'] = None
+    except Exception as e:
+        logger.warning("Job failed for %s: %s", list(files) or prompt, e)
+        record['response'] = None
+        record['error'] = str(e)
+    record['seconds'] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def list_files(directory, pattern="*", recursive=False):
+    root = Path(directory)
+    paths = root.rglob(pattern) if recursive else root.glob(pattern)
+    return sorted(str(p) for p in paths if p.is_file())
+
+
+def read_jobs(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise SystemExit(f"{path}:{number}: invalid JSON: {e}")
+            if isinstance(job, str):
+                job = {'prompt': job}
+            elif not isinstance(job, dict):
+                raise SystemExit(f"{path}:{number}: expected an object or a string, got {type(job).__name__}")
+            job.setdefault('id', number)
+            yield job
+
+
+def run_jobs(jobs, concurrency, out):
+    """Run (key, prompt, files) jobs concurrently, writing records in input order."""
+    failed = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [(key, pool.submit(answer, prompt, files)) for key, prompt, files in jobs]
+        for key, future in futures:
+            record = dict(key, **future.result())
+            failed += record['error'] is not None
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+    return failed
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m myiq", description=__doc__.splitlines()[0])
+    parser.add_argument("-v", "--verbose", action="store_true", help="log progress to stderr")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    digest = sub.add_parser("digest", help="summarize every file in a directory")
+    digest.add_argument("directory")
+    digest.add_argument("--prompt", default=ATTACHMENT_ONLY_PROMPT)
+    digest.add_argument("--glob", default="*", help="file name pattern (default: all files)")
+    digest.add_argument("--recursive", action="store_true")
+
+    prompts = sub.add_parser("prompts", help="answer the prompts in a JSONL file")
+    prompts.add_argument("jsonl")
+
+    for command in (digest, prompts):
+        command.add_argument("-j", "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                             help=f"jobs run at once (default: {DEFAULT_CONCURRENCY}); "
+                                  "LLM calls are also capped by OLLAMA_NUM_PARALLEL")
+        command.add_argument("-o", "--output", help="write results here instead of stdout")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
+    if args.command == "digest":
+        if not os.path.isdir(args.directory):
+            raise SystemExit(f"not a directory: {args.directory}")
+        jobs = [({'file': path}, args.prompt, [path])
+                for path in list_files(args.directory, args.glob, args.recursive)]
+    else:
+        jobs = [({'id': job['id']}, job.get('prompt', ""), job.get('files', []))
+                for job in read_jobs(args.jsonl)]
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    started = time.perf_counter()
+    try:
+        failed = run_jobs(jobs, max(1, args.concurrency), out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    logger.info("%d jobs, %d failed, in %.1fs", len(jobs), failed, time.perf_counter() - started)
+    return 1 if failed else 0
@@ -0,0 +1,109 @@
+# myiq/file_parser.py
+import os
+
+# Parser libraries are imported where they are used, so importing this
+# module (and starting the app) does not load pandas, OCR or PDF support
+
+# Bump whenever parse_file output changes so cached results are not reused
+PARSER_VERSION = 2
+
+TEXT_PREVIEW_CHARS = 1000
+CSV_PREVIEW_ROWS = 5
+CSV_CHUNK_ROWS = 100_000
+# Per-column stats need one streamed pass over the whole file
+CSV_SUMMARY_STATS = False
+
+# parse_file returns these instead of raising; documents may start with "[" too
+UNSUPPORTED_FILE_TYPE = "[Unsupported file type]"
+PARSE_ERROR_PREFIX = "[Error parsing file: "
+
+
+class ParseCancelled(Exception):
+    """Raised by a parse whose cancel event was set; nothing is cached."""
+
+
+def is_parse_error(text):
+    """Whether parse_file's result is a failure message rather than the file's text."""
+    return text == UNSUPPORTED_FILE_TYPE or text.startswith(PARSE_ERROR_PREFIX)
+
+
+def read_text_head(path, limit=TEXT_PREVIEW_CHARS):
+    # Only `limit` characters are decoded, however large the file is
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read(limit)
+
+def csv_preview(path, rows=CSV_PREVIEW_ROWS, stats=CSV_SUMMARY_STATS):
+    import pandas as pd
+    text = pd.read_csv(path, nrows=rows).to_string()
+    if stats:
+        text += "\n\n" + csv_summary(path)
+    return text
+
+def csv_summary(path, chunk_rows=CSV_CHUNK_ROWS):
+    """Row count and per-column null/min/max/mean, computed chunk by chunk."""
+    import pandas as pd
+    total_rows = 0
+    columns = {}
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        total_rows += len(chunk)
+        for name in chunk.columns:
+            col = chunk[name]
+            acc = columns.setdefault(name, {'nulls': 0, 'count': 0, 'sum': 0.0, 'min': None, 'max': None})
+            acc['nulls'] += int(col.isna().sum())
+            if pd.api.types.is_numeric_dtype(col):
+                values = col.dropna()
+                if values.empty:
+                    continue
+                acc['count'] += len(values)
+                acc['sum'] += float(values.sum())
+                low, high = values.min(), values.max()
+                acc['min'] = low if acc['min'] is None else min(acc['min'], low)
+                acc['max'] = high if acc['max'] is None else max(acc['max'], high)
+
+    summary = pd.DataFrame([
+        {
+            'column': name,
+            'nulls': acc['nulls'],
+            'min': acc['min'],
+            'max': acc['max'],
+            'mean': acc['sum'] / acc['count'] if acc['count'] else None
+        }
+        for name, acc in columns.items()
+    ])
+    return f"Rows: {total_rows}\n{summary.to_string(index=False)}"
+
+def parse_file(path: str, max_chars: int = None, cancel=None) -> str:
+    """Parse path to text; max_chars overrides the short per-type previews.
+
+    cancel is a threading.Event; setting it stops a PDF extraction between
+    page batches with ParseCancelled.
+    """
+    ext = os.path.splitext(path)[-1].lower()
+    try:
+        if ext == '.txt':
+            return read_text_head(path, max_chars or TEXT_PREVIEW_CHARS)
+        elif ext == '.csv':
+            return csv_preview(path)
+        elif ext in ['.png', '.jpg', '.jpeg']:
+            import pytesseract
+            from PIL import Image
+            text = pytesseract.image_to_string(Image.open(path))
+            return text.strip()[:max_chars or 500]
+        elif ext == '.pdf':
+            from .pdf_pipeline import extract_pdf_text, PDF_TEXT_BUDGET
+            text, _ = extract_pdf_text(path, budget=max_chars or PDF_TEXT_BUDGET, cancel=cancel)
+            return text
+        elif ext == '.docx':
+            import docx
+            doc = docx.Document(path)
+            text = '\n'.join([para.text for para in doc.paragraphs])
+            return text.strip()[:max_chars or 1000]
+        elif ext in ['.py', '.ipynb']:
+            return read_text_head(path, max_chars or TEXT_PREVIEW_CHARS)
+        else:
+            return UNSUPPORTED_FILE_TYPE
+
+    except ParseCancelled:
+        raise
+    except Exception as e:
+        return f"{PARSE_ERROR_PREFIX}{e}]"
@@ -0,0 +1,217 @@
+# myiq/notebooks.py
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+from .persistence import get_writer, write_file_atomic
+from .search_index import get_search_index
+
+logger = logging.getLogger(__name__)
+
+# Metadata of every notebook, kept next to them; not a .json so it is never
+# taken for one
+INDEX_FILE = "notebooks.index"
+INDEX_VERSION = 1
+
+
+def content_hash(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class NotebookSession:
+    def __init__(self, session_id=None, title="Untitled", content=""):
+        self.session_id = session_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.title = title
+        self.content = content
+        self.created_at = datetime.now()
+        self.updated_at = datetime.now()
+
+    def to_dict(self):
+        return {
+            "session_id": self.session_id,
+            "title": self.title,
+            "content": self.content,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        session = cls(data['session_id'], data['title'], data['content'])
+        session.created_at = datetime.fromisoformat(data['created_at'])
+        session.updated_at = datetime.fromisoformat(data['updated_at'])
+        return session
+
+class NotebookManager:
+    """Notebooks stored one JSON file each, listed from a metadata index.
+
+    The index holds each notebook's title, timestamps, content hash and the
+    size and mtime of its file. Saves and deletes update it as they happen;
+    listing only stats the directory and re-reads the files whose size or
+    mtime no longer match, so changes made outside the app are picked up.
+    Bodies are read when a notebook is opened.
+    """
+
+    def __init__(self, data_dir="notebook_data"):
+        self.data_dir = data_dir
+        os.makedirs(data_dir, exist_ok=True)
+        self.index_path = os.path.join(data_dir, INDEX_FILE)
+        self.lock = threading.Lock()
+        self.index_lock = threading.Lock()
+        self.entries = self.read_index()
+        # (mtime, size) of files that failed to parse, so they are not retried
+        self.unreadable = {}
+        self.search_index = get_search_index()
+        self.writer = get_writer()
+        if not self.search_index.is_backfilled("notebook"):
+            # Files read while listing are (re)indexed for search
+            self.entries = {}
+            self.get_session_list()
+            self.search_index.mark_backfilled("notebook")
+
+    def session_path(self, session_id):
+        return os.path.join(self.data_dir, f"{session_id}.json")
+
+    def read_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Rebuilding notebook index %s: %s", self.index_path, e)
+            return {}
+        if data.get('version') != INDEX_VERSION:
+            return {}
+        # Entries whose write never finished are read again from their files
+        return {i: e for i, e in data['notebooks'].items() if e['mtime'] is not None}
+
+    def write_index(self):
+        with self.index_lock:
+            with self.lock:
+                data = {'version': INDEX_VERSION, 'notebooks': self.entries}
+                payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            return write_file_atomic(self.index_path, payload)
+
+    def schedule_index_write(self):
+        self.writer.schedule(("notebook-index", self.data_dir), self.write_index)
+
+    def read_entry(self, session_id, path, stat):
+        """Index entry for a notebook file, or None if it cannot be read."""
+        if self.unreadable.get(path) == (stat.st_mtime_ns, stat.st_size):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            entry = {
+                'title': data['title'],
+                'created_at': data['created_at'],
+                'updated_at': data['updated_at'],
+                'hash': content_hash(data['content']),
+                'size': stat.st_size,
+                'mtime': stat.st_mtime_ns,
+            }
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Skipping notebook %s: %s", path, e)
+            self.unreadable[path] = (stat.st_mtime_ns, stat.st_size)
+            return None
+        self.unreadable.pop(path, None)
+        self.search_index.put_notebook(session_id, data['title'], data['content'])
+        return entry
+
+    def get_session_list(self):
+        """Metadata of every notebook as dicts, most recently updated first."""
+        seen = set()
+        changed = False
+        for dir_entry in os.scandir(self.data_dir):
+            if not dir_entry.name.endswith(".json"):
+                continue
+            session_id = dir_entry.name[:-len(".json")]
+            seen.add(session_id)
+            stat = dir_entry.stat()
+            with self.lock:
+                entry = self.entries.get(session_id)
+            # An mtime of None means a save of it is still being written
+            if entry and (entry['mtime'] is None or
+                          (entry['mtime'], entry['size']) == (stat.st_mtime_ns, stat.st_size)):
+                continue
+            entry = self.read_entry(session_id, dir_entry.path, stat)
+            with self.lock:
+                if entry:
+                    self.entries[session_id] = entry
+                    changed = True
+                elif self.entries.pop(session_id, None):
+                    changed = True
+        with self.lock:
+            for session_id in [i for i, e in self.entries.items() if i not in seen and e['mtime'] is not None]:
+                del self.entries[session_id]
+                changed = True
+            sessions = [dict(entry, id=session_id) for session_id, entry in self.entries.items()]
+        if changed:
+            self.schedule_index_write()
+        sessions.sort(key=lambda x: x['updated_at'], reverse=True)
+        return sessions
+
+    def load_session(self, session_id):
+        self.writer.flush([("notebook", session_id)])
+        path = self.session_path(session_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return NotebookSession.from_dict(json.load(f))
+
+    def save_session(self, session: NotebookSession):
+        digest = content_hash(session.content)
+        with self.lock:
+            entry = self.entries.get(session.session_id)
+            if entry and entry['hash'] == digest and entry['title'] == session.title:
+                return
+            session.updated_at = datetime.now()
+            # Snapshot now; the write happens later on the writer thread
+            data = session.to_dict()
+            self.entries[session.session_id] = {
+                'title': data['title'],
+                'created_at': data['created_at'],
+                'updated_at': data['updated_at'],
+                'hash': digest,
+                'size': None,
+                'mtime': None,
+            }
+        self.writer.schedule(("notebook", session.session_id), lambda: self.write_session(data))
+
+    def write_session(self, data):
+        path = self.session_path(data['session_id'])
+        payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        fsync_seconds = write_file_atomic(path, payload)
+        stat = os.stat(path)
+        with self.lock:
+            entry = self.entries.get(data['session_id'])
+            # A newer save of the notebook keeps its entry pending
+            if entry and entry['updated_at'] == data['updated_at']:
+                entry.update(size=stat.st_size, mtime=stat.st_mtime_ns)
+        fsync_seconds += self.write_index()
+        self.search_index.put_notebook(data['session_id'], data['title'], data['content'])
+        return fsync_seconds
+
+    def delete_session(self, session_id):
+        self.writer.cancel(("notebook", session_id))
+        path = self.session_path(session_id)
+        if os.path.exists(path):
+            os.remove(path)
+        with self.lock:
+            self.entries.pop(session_id, None)
+        self.schedule_index_write()
+        self.search_index.delete_notebook(session_id)
+
+    def search(self, text):
+        """(metadata, snippet) for the notebooks matching text, best first."""
+        self.writer.flush()
+        sessions = {entry['id']: entry for entry in self.get_session_list()}
+        return [
+            (sessions[hit['id']], hit['snippet'])
+            for hit in self.search_index.search(text, kind="notebook")
+            if hit['id'] in sessions
+        ]
@@ -0,0 +1,115 @@
+# myiq/parse_cache.py
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+from .file_parser import is_parse_error, parse_file, PARSER_VERSION
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = "parse_cache"
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def file_digest(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ParseCache:
+    """On-disk cache of parsed attachment text.
+
+    Entries are keyed by the file's SHA-256, its extension (which picks the
+    parser) and PARSER_VERSION, so renamed or moved copies hit the same
+    entry and a parser change invalidates everything. Each entry is a
+    plain text file whose mtime is bumped on every hit; the least recently
+    used entries are evicted once the cache grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.total_bytes = sum(size for _, _, size in self.entries())
+
+    def key_for(self, path, max_chars=None):
+        ext = os.path.splitext(path)[-1].lower().lstrip(".") or "none"
+        key = f"{file_digest(path)}-{ext}-v{PARSER_VERSION}"
+        if max_chars:
+            key += f"-{max_chars}"
+        return key
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def entries(self):
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".txt"):
+                st = entry.stat()
+                yield entry.path, st.st_mtime, st.st_size
+
+    def get(self, key):
+        path = self.entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return text
+
+    def put(self, key, text):
+        data = text.encode("utf-8")
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        path = self.entry_path(key)
+        with self.lock:
+            if os.path.exists(path):
+                self.total_bytes -= os.path.getsize(path)
+            os.replace(tmp_path, path)
+            self.total_bytes += len(data)
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+
+    def evict(self):
+        for path, _, size in sorted(self.entries(), key=lambda e: e[1]):
+            if self.total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.total_bytes -= size
+            except OSError as e:
+                logger.warning("Could not evict %s: %s", path, e)
+
+    def parse(self, path, max_chars=None, cancel=None):
+        """Return (cache_key, text) for path, parsing only on a cache miss."""
+        key = self.key_for(path, max_chars)
+        text = self.get(key)
+        if text is None:
+            text = parse_file(path, max_chars, cancel)
+            # Failures are not cached so a fixed environment can retry them
+            if not is_parse_error(text):
+                self.put(key, text)
+        return key, text
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_parse_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ParseCache()
+        return _cache
@@ -0,0 +1,149 @@
+# myiq/pdf_pipeline.py
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pdfplumber
+
+from .file_parser import ParseCancelled
+
+logger = logging.getLogger(__name__)
+
+PDF_TEXT_BUDGET = 1000
+PAGES_PER_TASK = 4
+OCR_RESOLUTION = 300
+# How often a wait on the process pool checks for cancellation
+CANCEL_POLL_SECONDS = 0.1
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Process pool shared by all PDF extractions, started on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: forking a process that runs Qt threads is not safe
+            _executor = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 2,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def ocr_page(page):
+    import pytesseract
+    image = page.to_image(resolution=OCR_RESOLUTION).original
+    return pytesseract.image_to_string(image)
+
+
+def extract_pages(path, page_numbers, ocr=True):
+    """Extract the given pages, falling back to OCR for pages with no text layer."""
+    results = []
+    with pdfplumber.open(path) as pdf:
+        for number in page_numbers:
+            start = time.perf_counter()
+            page = pdf.pages[number]
+            text = page.extract_text() or ""
+            used_ocr = False
+            if ocr and not text.strip():
+                try:
+                    text = ocr_page(page)
+                    used_ocr = True
+                except Exception as e:
+                    # A missing tesseract should not lose the pages that have text
+                    logger.warning("OCR failed on %s page %d: %s", path, number + 1, e)
+            results.append({
+                'page': number,
+                'text': text,
+                'ocr': used_ocr,
+                'seconds': time.perf_counter() - start
+            })
+    return results
+
+
+def extract_pdf_text(path, budget=PDF_TEXT_BUDGET, ocr=True, workers=None, cancel=None):
+    """Extract text from a PDF, stopping once `budget` characters are found.
+
+    Pages are split into small batches that run in a process pool, a few
+    batches ahead of the first page still missing. As soon as the pages
+    finished in order cover the budget, queued batches are cancelled; the
+    same happens, raising ParseCancelled, once the `cancel` event is set.
+    Returns (text, page_stats) where page_stats has per-page timings.
+    """
+    started = time.perf_counter()
+    with pdfplumber.open(path) as pdf:
+        page_total = len(pdf.pages)
+    batches = [
+        list(range(i, min(i + PAGES_PER_TASK, page_total)))
+        for i in range(0, page_total, PAGES_PER_TASK)
+    ]
+    workers = workers or os.cpu_count() or 2
+
+    pages = {}
+    if len(batches) <= 1 or workers == 1:
+        # Not worth a round trip through the pool
+        for batch in batches:
+            if cancel is not None and cancel.is_set():
+                raise ParseCancelled(path)
+            for result in extract_pages(path, batch, ocr):
+                pages[result['page']] = result
+            if budget and prefix_length(pages) >= budget:
+                break
+    else:
+        extract_parallel(path, batches, pages, budget, ocr, workers * 2, cancel)
+
+    ordered = [pages[n] for n in sorted(pages)]
+    text = "\n".join(p['text'] for p in ordered).strip()
+    if budget:
+        text = text[:budget]
+
+    for p in ordered:
+        logger.debug("%s page %d: %.3fs%s", path, p['page'] + 1, p['seconds'], " (OCR)" if p['ocr'] else "")
+    logger.info(
+        "%s: %d of %d pages in %.2fs (%d OCR)",
+        path, len(ordered), page_total, time.perf_counter() - started,
+        sum(p['ocr'] for p in ordered),
+    )
+    stats = [{k: p[k] for k in ('page', 'ocr', 'seconds')} for p in ordered]
+    return text, stats
+
+
+def extract_parallel(path, batches, pages, budget, ocr, window, cancel=None):
+    executor = get_executor()
+    pending = set()
+    next_batch = 0
+    while True:
+        while next_batch < len(batches) and len(pending) < window:
+            pending.add(executor.submit(extract_pages, path, batches[next_batch], ocr))
+            next_batch += 1
+        if not pending:
+            break
+        timeout = None if cancel is None else CANCEL_POLL_SECONDS
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if cancel is not None and cancel.is_set():
+            # Batches already running finish on their own, a few pages each
+            for future in pending:
+                future.cancel()
+            raise ParseCancelled(path)
+        for future in done:
+            for result in future.result():
+                pages[result['page']] = result
+        if budget and prefix_length(pages) >= budget:
+            for future in pending:
+                future.cancel()
+            break
+
+
+def prefix_length(pages):
+    """Characters available from page 0 up to the first page not yet extracted."""
+    total = 0
+    number = 0
+    while number in pages:
+        total += len(pages[number]['text'])
+        number += 1
+    return total
@@ -0,0 +1,178 @@
+# myiq/persistence.py
+import atexit
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# A key is written once it has been quiet this long...
+SAVE_DELAY = 1.0
+# ...or this long after its first unwritten save, so constant edits still land
+SAVE_MAX_DELAY = 5.0
+
+
+def write_file_atomic(path, data):
+    """Write bytes to path via a synced temp file and rename; returns fsync seconds."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            start = time.perf_counter()
+            os.fsync(f.fileno())
+            fsync_seconds = time.perf_counter() - start
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return fsync_seconds
+
+
+class LatencyStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def summary(self):
+        mean = self.total / self.count if self.count else 0.0
+        return {'count': self.count, 'mean_ms': mean * 1000, 'max_ms': self.max * 1000}
+
+
+class WriteBehind:
+    """Runs saves on a background thread, coalescing bursts per key.
+
+    schedule(key, write) replaces any save still pending for key, so a run
+    of saves to the same chat or notebook becomes one write of the latest
+    state. A write callable may return the seconds it spent in fsync, which
+    are reported with the other write timings. flush() runs pending writes
+    now, for readers that need them on disk; close() drains the queue and
+    is registered to run at exit.
+    """
+
+    def __init__(self, delay=SAVE_DELAY, max_delay=SAVE_MAX_DELAY):
+        self.delay = delay
+        self.max_delay = max_delay
+        self.pending = {}
+        self.running = None
+        self.closed = False
+        self.condition = threading.Condition()
+        self.write_stats = LatencyStats()
+        self.fsync_stats = LatencyStats()
+        self.worker = threading.Thread(target=self.run, name="write-behind", daemon=True)
+        self.worker.start()
+
+    def schedule(self, key, write):
+        now = time.monotonic()
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("write-behind queue is closed")
+            first = self.pending[key][2] if key in self.pending else now
+            self.pending[key] = (write, now, first)
+            self.condition.notify()
+
+    def due_at(self, entry):
+        _, last, first = entry
+        return min(last + self.delay, first + self.max_delay)
+
+    def run(self):
+        while True:
+            with self.condition:
+                while True:
+                    if self.pending:
+                        key, entry = min(self.pending.items(), key=lambda kv: self.due_at(kv[1]))
+                        wait = 0 if self.closed else self.due_at(entry) - time.monotonic()
+                        if wait <= 0:
+                            del self.pending[key]
+                            self.running = key
+                            break
+                        self.condition.wait(wait)
+                    elif self.closed:
+                        return
+                    else:
+                        self.condition.wait()
+            try:
+                self.execute(key, entry[0])
+            finally:
+                with self.condition:
+                    self.running = None
+                    self.condition.notify_all()
+
+    def execute(self, key, write):
+        start = time.perf_counter()
+        try:
+            fsync_seconds = write()
+        except Exception:
+            logger.exception("Background save of %s failed", key)
+            return
+        elapsed = time.perf_counter() - start
+        with self.condition:
+            self.write_stats.add(elapsed)
+            if fsync_seconds is not None:
+                self.fsync_stats.add(fsync_seconds)
+        logger.debug(
+            "Saved %s in %.1f ms%s", key, elapsed * 1000,
+            "" if fsync_seconds is None else f" (fsync {fsync_seconds * 1000:.1f} ms)",
+        )
+
+    def flush(self, keys=None):
+        """Write the pending saves for keys (all when None) before returning."""
+        with self.condition:
+            self.wait_idle(keys)
+            if keys is None:
+                keys = list(self.pending)
+            entries = [(key, self.pending.pop(key)) for key in keys if key in self.pending]
+        # Run on the calling thread rather than waiting for the worker's turn
+        for key, (write, _, _) in entries:
+            self.execute(key, write)
+
+    def cancel(self, key):
+        """Drop a pending save, e.g. for something that is being deleted."""
+        with self.condition:
+            self.pending.pop(key, None)
+            self.wait_idle([key])
+
+    def wait_idle(self, keys):
+        while self.running is not None and (keys is None or self.running in keys):
+            self.condition.wait()
+
+    def stats(self):
+        return {'write': self.write_stats.summary(), 'fsync': self.fsync_stats.summary()}
+
+    def close(self):
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify_all()
+        self.worker.join()
+        stats = self.stats()
+        if stats['write']['count']:
+            logger.info(
+                "Background saves: %d writes, mean %.1f ms, max %.1f ms; fsync mean %.1f ms, max %.1f ms",
+                stats['write']['count'], stats['write']['mean_ms'], stats['write']['max_ms'],
+                stats['fsync']['mean_ms'], stats['fsync']['max_ms'],
+            )
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = WriteBehind()
+            atexit.register(_writer.close)
+        return _writer
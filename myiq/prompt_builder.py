@@ -0,0 +1,153 @@
+# myiq/prompt_builder.py
+import logging
+
+from .chat_handler import CONTEXT_WINDOW, client
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = (
+    "You are MyIQ, a private knowledge assistant running locally. "
+    "Answer clearly and concisely, and use the attached content when it is relevant."
+)
+# Tokens left free for the model's answer
+RESPONSE_RESERVE = 1024
+# Per-message framing the chat template adds around the content
+MESSAGE_OVERHEAD = 4
+SUMMARY_MAX_TOKENS = 512
+# When turns must be dropped, keep only this share of the turn budget so the
+# rolling summary is refreshed every few turns rather than on every turn
+RECENT_FRACTION = 0.5
+
+SUMMARY_PROMPT = (
+    "Update the running summary of a conversation between a user and an assistant. "
+    "Keep names, facts, decisions and open questions; drop pleasantries. "
+    "Reply with the summary only, in at most 200 words."
+)
+
+
+def count_tokens(text):
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4 + MESSAGE_OVERHEAD
+
+
+def truncate_to_tokens(text, tokens):
+    limit = max(0, tokens - MESSAGE_OVERHEAD) * 4
+    return text if len(text) <= limit else text[:limit]
+
+
+def turn_message(message):
+    return {"role": "user" if message['is_user'] else "assistant", "content": message['text']}
+
+
+def summarize_turns(summary, turns):
+    transcript = "\n".join(
+        f"{'User' if m['is_user'] else 'Assistant'}: {m['text']}" for m in turns
+    )
+    messages = [
+        {"role": "system", "content": SUMMARY_PROMPT},
+        {"role": "user", "content": f"Current summary:\n{summary or '(none)'}\n\nNew turns:\n{transcript}"},
+    ]
+    return client.chat(messages)
+
+
+class PromptBuilder:
+    """Assembles an /api/chat messages array that fits the context window.
+
+    The budget is filled by priority: system prompt and question first,
+    then attachment context (at most half of what is left), then the most
+    recent turns, newest first. Turns that no longer fit are folded into a
+    rolling summary kept with the session, so older context costs a few
+    hundred tokens instead of being re-sent or silently cut off.
+
+    Messages are ordered from most to least stable (system prompt and
+    summary, past turns, then this turn's attachments and question) so
+    consecutive requests share a long prefix and Ollama can reuse its KV
+    cache instead of re-evaluating the whole conversation.
+    """
+
+    def __init__(self, context_window=CONTEXT_WINDOW, reserve=RESPONSE_RESERVE,
+                 system_prompt=SYSTEM_PROMPT, summarize=summarize_turns):
+        self.budget = context_window - reserve
+        self.system_prompt = system_prompt
+        self.summarize = summarize
+
+    def build(self, question, history, first_seq=0, context="", summary="", summary_upto=0,
+              load_turns=None):
+        """Return (messages, summary, summary_upto).
+
+        history holds the turns before the question; history[0] has sequence
+        number first_seq. summary covers every turn with seq < summary_upto.
+        When history starts after summary_upto, load_turns(start, end) must
+        return the turns in between, or the summary cannot be extended.
+        """
+        used = count_tokens(self.system_prompt) + count_tokens(question)
+        if context:
+            context = truncate_to_tokens(context, max(0, self.budget - used) // 2)
+            used += count_tokens(context)
+
+        if first_seq > summary_upto and load_turns is not None:
+            earlier = list(load_turns(summary_upto, first_seq))
+            if len(earlier) == first_seq - summary_upto:
+                history = earlier + list(history)
+                first_seq = summary_upto
+        # Turns already covered by the summary are never sent again
+        start = min(len(history), max(0, summary_upto - first_seq))
+        turns_budget = self.budget - used - count_tokens(summary)
+        keep_from = self.fit_turns(history, start, turns_budget)
+
+        # Folding turns that follow a gap would claim the gap as summarized
+        if keep_from > start and first_seq <= summary_upto:
+            fitted = keep_from
+            keep_from = self.fit_turns(history, start, int(turns_budget * RECENT_FRACTION))
+            try:
+                summary = self.fold(summary, history[start:keep_from])
+                summary_upto = first_seq + keep_from
+                # The new summary may be longer than the old one
+                turns_budget = self.budget - used - count_tokens(summary)
+                keep_from = max(keep_from, self.fit_turns(history, keep_from, turns_budget))
+            except Exception as e:
+                logger.warning("Could not update conversation summary: %s", e)
+                keep_from = fitted
+
+        system = self.system_prompt
+        if summary:
+            system += f"\n\nSummary of the earlier conversation:\n{summary}"
+        messages = [{"role": "system", "content": system}]
+        messages.extend(turn_message(m) for m in history[keep_from:])
+        # Attachment excerpts change every turn, keep them out of the prefix
+        if context:
+            question = f"{question}\n\nAttached Content:\n{context}"
+        messages.append({"role": "user", "content": question})
+        return messages, summary, summary_upto
+
+    def warm_up_messages(self):
+        """The prefix every new conversation starts with."""
+        return [{"role": "system", "content": self.system_prompt}]
+
+    def fold(self, summary, turns):
+        """summary extended with turns, summarized in batches that fit the window."""
+        limit = self.budget - count_tokens(SUMMARY_PROMPT) - SUMMARY_MAX_TOKENS
+        batch = []
+        size = 0
+        for turn in turns:
+            tokens = count_tokens(turn['text'])
+            if batch and size + tokens > limit:
+                summary = truncate_to_tokens(self.summarize(summary, batch), SUMMARY_MAX_TOKENS)
+                batch = []
+                size = 0
+            batch.append(turn)
+            size += tokens
+        if batch:
+            summary = truncate_to_tokens(self.summarize(summary, batch), SUMMARY_MAX_TOKENS)
+        return summary
+
+    def fit_turns(self, history, start, budget):
+        """Index of the oldest turn at or after start such that the rest fit."""
+        keep_from = len(history)
+        total = 0
+        for i in range(len(history) - 1, start - 1, -1):
+            total += count_tokens(history[i]['text'])
+            if total > budget:
+                break
+            keep_from = i
+        return keep_from
@@ -0,0 +1,263 @@
+# myiq/retrieval.py
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+
+import numpy as np
+import requests
+
+from .chat_handler import client
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIR = "vector_index"
+# Per embedding model; the least recently searched documents go first
+MAX_INDEX_BYTES = 512 * 1024 * 1024
+EMBED_MODEL = os.environ.get("MYIQ_EMBED_MODEL", "nomic-embed-text")
+CHUNK_CHARS = 800
+CHUNK_OVERLAP = 200
+TOP_K = 4
+# Chunks sent per /api/embed request
+EMBED_BATCH = 64
+# Attachments are parsed up to this size for chunking instead of a short preview
+DOCUMENT_MAX_CHARS = 2_000_000
+
+
+def chunk_text(text, size=CHUNK_CHARS, overlap=CHUNK_OVERLAP):
+    """Split text into overlapping chunks, preferring to break at whitespace."""
+    text = text.strip()
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            space = text.rfind(" ", start + size // 2, end)
+            if space != -1:
+                end = space
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return [c for c in chunks if c]
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class OllamaEmbedder:
+    """Embeds text through Ollama's /api/embed endpoint, EMBED_BATCH at a time.
+
+    Ollama versions without /api/embed get one /api/embeddings call per text.
+    """
+
+    def __init__(self, model=EMBED_MODEL, ollama=client, batch_size=EMBED_BATCH):
+        self.name = model
+        self.ollama = ollama
+        self.batch_size = batch_size
+        self.batched = True
+
+    def embed(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self.embed_batch(texts[start:start + self.batch_size]))
+        return normalize(vectors)
+
+    def embed_batch(self, texts):
+        if self.batched:
+            try:
+                return self.ollama.post("/api/embed", {"model": self.name, "input": texts}).json()["embeddings"]
+            except requests.HTTPError as e:
+                if e.response is None or e.response.status_code != 404:
+                    raise
+                logger.info("Ollama has no /api/embed, embedding one text per request")
+                self.batched = False
+        return [
+            self.ollama.post("/api/embeddings", {"model": self.name, "prompt": text}).json()["embedding"]
+            for text in texts
+        ]
+
+
+class HashingEmbedder:
+    """Dependency-free bag-of-words embedder, for tests and offline use."""
+
+    def __init__(self, dim=256):
+        self.name = f"hashing-{dim}"
+        self.dim = dim
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                bucket = int.from_bytes(hashlib.md5(word.encode()).digest()[:4], "little")
+                vectors[row, bucket % self.dim] += 1.0
+        return normalize(vectors)
+
+
+class VectorIndex:
+    """Persistent chunk vectors, one .npy matrix per document.
+
+    Documents are keyed by their parse-cache key, so a file is embedded once
+    no matter how often it is attached. Each matrix is written atomically
+    next to a JSON list of its chunk texts and is memory-mapped on read, so
+    searching a few attachments never loads the rest of the index. Like the
+    parse cache, a load bumps the document's mtime and the least recently
+    used documents are evicted once the index grows past max_bytes.
+    """
+
+    def __init__(self, index_dir, mmap=True, max_bytes=MAX_INDEX_BYTES):
+        self.index_dir = index_dir
+        self.mmap = mmap
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(index_dir, exist_ok=True)
+        self.total_bytes = sum(size for _, _, size in self.entries())
+
+    def paths(self, doc_id):
+        base = os.path.join(self.index_dir, doc_id)
+        return f"{base}.npy", f"{base}.json"
+
+    def has(self, doc_id):
+        return all(os.path.exists(p) for p in self.paths(doc_id))
+
+    def entries(self):
+        """(doc_id, mtime, bytes) of every document, dated by its matrix."""
+        sizes = {}
+        mtimes = {}
+        for entry in os.scandir(self.index_dir):
+            doc_id, ext = os.path.splitext(entry.name)
+            if ext not in (".npy", ".json"):
+                continue
+            st = entry.stat()
+            sizes[doc_id] = sizes.get(doc_id, 0) + st.st_size
+            if ext == ".npy":
+                mtimes[doc_id] = st.st_mtime
+        for doc_id, size in sizes.items():
+            yield doc_id, mtimes.get(doc_id, 0), size
+
+    def size(self, doc_id):
+        return sum(os.path.getsize(p) for p in self.paths(doc_id) if os.path.exists(p))
+
+    def add(self, doc_id, chunks, vectors):
+        npy_path, json_path = self.paths(doc_id)
+        with self.lock:
+            self.total_bytes -= self.size(doc_id)
+            self.write_atomic(json_path, lambda f: f.write(json.dumps(chunks, ensure_ascii=False).encode("utf-8")))
+            self.write_atomic(npy_path, lambda f: np.save(f, np.asarray(vectors, dtype=np.float32)))
+            self.total_bytes += self.size(doc_id)
+            if self.total_bytes > self.max_bytes:
+                self.evict(keep=doc_id)
+
+    def evict(self, keep=None):
+        for doc_id, _, size in sorted(self.entries(), key=lambda e: e[1]):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if doc_id == keep:
+                continue
+            try:
+                for path in self.paths(doc_id):
+                    if os.path.exists(path):
+                        os.remove(path)
+                self.total_bytes -= size
+            except OSError as e:
+                logger.warning("Could not evict %s: %s", doc_id, e)
+
+    def write_atomic(self, path, write):
+        fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+
+    def load(self, doc_id):
+        npy_path, json_path = self.paths(doc_id)
+        with open(json_path, "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+        vectors = np.load(npy_path, mmap_mode="r" if self.mmap else None)
+        try:
+            os.utime(npy_path)
+        except OSError:
+            pass
+        return chunks, vectors
+
+    def search(self, query_vector, doc_ids, k=TOP_K):
+        """Top-k chunks by cosine similarity as (score, doc_id, chunk_no, text)."""
+        hits = []
+        for doc_id in doc_ids:
+            if not self.has(doc_id):
+                continue
+            chunks, vectors = self.load(doc_id)
+            if not len(chunks):
+                continue
+            scores = vectors @ query_vector
+            top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+            hits.extend((float(scores[i]), doc_id, int(i), chunks[i]) for i in top)
+        hits.sort(key=lambda h: h[0], reverse=True)
+        return hits[:k]
+
+
+class Retriever:
+    def __init__(self, embedder=None, index_dir=INDEX_DIR):
+        self.embedder = embedder or OllamaEmbedder()
+        # Vectors from different models are not comparable, keep them apart
+        safe_name = re.sub(r"[^\w.-]", "_", self.embedder.name)
+        self.index = VectorIndex(os.path.join(index_dir, safe_name))
+        # doc_id -> Event set once a background indexing of it has ended
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def index_document(self, doc_id, text):
+        if self.index.has(doc_id):
+            return
+        chunks = chunk_text(text)
+        vectors = self.embedder.embed(chunks) if chunks else np.zeros((0, 0), dtype=np.float32)
+        self.index.add(doc_id, chunks, vectors)
+
+    def index_in_background(self, doc_id, text, name=None):
+        """Index a document on a thread of its own; see wait_indexed."""
+        with self.lock:
+            if doc_id in self.pending or self.index.has(doc_id):
+                return
+            done = self.pending[doc_id] = threading.Event()
+
+        def run():
+            try:
+                self.index_document(doc_id, text)
+            except Exception as e:
+                logger.warning("Could not index %s for retrieval: %s", name or doc_id, e)
+            finally:
+                with self.lock:
+                    del self.pending[doc_id]
+                done.set()
+
+        threading.Thread(target=run, name="embed", daemon=True).start()
+
+    def wait_indexed(self, doc_id, timeout=None):
+        """Wait for a background indexing of doc_id; True if it is in the index."""
+        with self.lock:
+            done = self.pending.get(doc_id)
+        if done is not None:
+            done.wait(timeout)
+        return self.index.has(doc_id)
+
+    def retrieve(self, question, doc_ids, k=TOP_K):
+        query = self.embedder.embed([question])[0]
+        return self.index.search(query, doc_ids, k)
+
+
+_retriever = None
+_retriever_lock = threading.Lock()
+
+
+def get_retriever():
+    global _retriever
+    with _retriever_lock:
+        if _retriever is None:
+            _retriever = Retriever()
+        return _retriever
@@ -0,0 +1,205 @@
+# myiq/scheduler.py
+import atexit
+import heapq
+import itertools
+import logging
+import os
+import threading
+
+from .chat_handler import client
+
+logger = logging.getLogger(__name__)
+
+# Requests Ollama serves at once per model; any more only queue in the server,
+# where they can no longer be reordered or dropped
+MAX_PARALLEL = max(1, int(os.environ.get("OLLAMA_NUM_PARALLEL", "1")))
+
+# Lower runs first
+INTERACTIVE = 0
+BACKGROUND = 10
+
+
+class Cancelled(Exception):
+    """Raised inside a job once its request has been cancelled."""
+
+
+class LLMRequest:
+    """One job queued on the scheduler.
+
+    The job is called as job(request) on a scheduler thread and returns the
+    reply text. It talks to Ollama through request.chat/stream_chat/generate
+    so that cancel() can close an in-flight stream. owner tags the request
+    with whoever issued it (a chat session id, "voice", ...), so the reply
+    can be routed back there and all of an owner's requests cancelled.
+    """
+
+    def __init__(self, job, priority=INTERACTIVE, owner=None, on_chunk=None, on_done=None):
+        self.job = job
+        self.priority = priority
+        self.owner = owner
+        self.on_chunk = on_chunk
+        self.on_done = on_done
+        # Streamed text so far, readable from any thread
+        self.pieces = []
+        self.result = None
+        self.error = None
+        self.response = None
+        self.lock = threading.Lock()
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+
+    def cancel(self):
+        with self.lock:
+            self.cancel_event.set()
+            response, self.response = self.response, None
+        if response is not None:
+            client.abort(response)
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def is_done(self):
+        return self.done_event.is_set()
+
+    def wait(self, timeout=None):
+        return self.done_event.wait(timeout)
+
+    def check(self):
+        if self.is_cancelled():
+            raise Cancelled()
+
+    def attach(self, response):
+        with self.lock:
+            cancelled = self.is_cancelled()
+            if not cancelled:
+                self.response = response
+        if cancelled:
+            client.abort(response)
+            raise Cancelled()
+
+    def detach(self):
+        with self.lock:
+            self.response = None
+
+    def chat(self, messages):
+        self.check()
+        text = client.chat(messages)
+        self.check()
+        return text
+
+    def generate(self, prompt):
+        self.check()
+        text = client.generate(prompt)
+        self.check()
+        return text
+
+    def stream_chat(self, messages):
+        """Stream a chat reply, passing each piece to on_chunk; returns the text."""
+        self.check()
+        try:
+            for piece in client.stream_chat(messages, on_open=self.attach):
+                self.check()
+                self.pieces.append(piece)
+                if self.on_chunk:
+                    self.on_chunk(self, piece)
+        except Exception:
+            # Aborting the stream surfaces as a read error
+            self.check()
+            raise
+        finally:
+            self.detach()
+        self.check()
+        return "".join(self.pieces)
+
+
+class LLMScheduler:
+    """Runs LLM requests on MAX_PARALLEL threads, highest priority first.
+
+    Requests of equal priority run in submission order. A cancelled request
+    still queued is dropped when it comes up; one already running has its
+    HTTP stream closed. on_done(request) is called on the scheduler thread
+    once the request has finished, failed or been cancelled.
+    """
+
+    def __init__(self, workers=MAX_PARALLEL):
+        self.queue = []
+        self.counter = itertools.count()
+        self.running = set()
+        self.closed = False
+        self.condition = threading.Condition()
+        self.threads = [
+            threading.Thread(target=self.run, name=f"myiq-llm-{n}", daemon=True)
+            for n in range(workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, job, priority=INTERACTIVE, owner=None, on_chunk=None, on_done=None):
+        request = LLMRequest(job, priority, owner, on_chunk, on_done)
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("LLM scheduler is closed")
+            heapq.heappush(self.queue, (priority, next(self.counter), request))
+            self.condition.notify()
+        return request
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.queue and not self.closed:
+                    self.condition.wait()
+                if not self.queue:
+                    return
+                _, _, request = heapq.heappop(self.queue)
+                self.running.add(request)
+            try:
+                self.execute(request)
+            finally:
+                with self.condition:
+                    self.running.discard(request)
+
+    def execute(self, request):
+        try:
+            request.check()
+            request.result = request.job(request)
+        except Cancelled:
+            pass
+        except Exception as e:
+            logger.warning("LLM request for %s failed: %s", request.owner, e)
+            request.error = e
+        request.done_event.set()
+        if request.on_done:
+            try:
+                request.on_done(request)
+            except Exception:
+                logger.exception("LLM request callback failed")
+
+    def requests(self, owner=None):
+        """Queued and running requests, all or those of one owner."""
+        with self.condition:
+            queued = [request for _, _, request in self.queue]
+            requests = list(self.running) + queued
+        return [r for r in requests if owner is None or r.owner == owner]
+
+    def cancel(self, owner=None):
+        for request in self.requests(owner):
+            request.cancel()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.cancel()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+            atexit.register(_scheduler.close)
+        return _scheduler
@@ -0,0 +1,267 @@
+# myiq/search_index.py
+import logging
+import os
+import re
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+SEARCH_DB = os.path.join("search_data", "index.db")
+
+# Bumped when the tables change; the index is derived data, so an index
+# from another version is dropped and backfilled again
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    UNIQUE (kind, doc_id)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS titles USING fts5(
+    title,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS passages USING fts5(
+    body,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS passage_refs (
+    passage INTEGER PRIMARY KEY,
+    document INTEGER NOT NULL,
+    ref INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS passage_refs_by_document ON passage_refs (document);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Every table, dropped when the schema version changes
+TABLES = ["documents", "titles", "passages", "passage_refs", "meta"]
+
+# bm25 scores are negative; a title match counts this many times a body match
+TITLE_WEIGHT = 5.0
+
+# The best passage of each document ranks it against the document's title;
+# rowid of titles is documents.id
+SEARCH_SQL = """
+WITH body AS (
+    SELECT r.document, r.passage, r.ref, bm25(passages) AS rank
+    FROM passages JOIN passage_refs r ON r.passage = passages.rowid
+    WHERE passages MATCH :query
+),
+best AS (
+    SELECT document, passage, ref, rank,
+           ROW_NUMBER() OVER (PARTITION BY document ORDER BY rank) AS n
+    FROM body
+),
+scored AS (
+    SELECT document, passage, ref, rank FROM best WHERE n = 1
+    UNION ALL
+    SELECT rowid, NULL, NULL, bm25(titles) * :title_weight FROM titles WHERE titles MATCH :query
+)
+SELECT d.kind, d.doc_id, d.title, MAX(s.passage) AS passage, MAX(s.ref) AS ref, MIN(s.rank) AS rank
+FROM scored s JOIN documents d ON d.id = s.document
+WHERE :kind IS NULL OR d.kind = :kind
+GROUP BY s.document
+ORDER BY rank
+LIMIT :limit
+"""
+
+
+def to_match_query(text):
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    words = re.findall(r"\w+", text, flags=re.UNICODE)
+    return " ".join(f'"{w}"*' for w in words)
+
+
+class SearchIndex:
+    """Incrementally updated full-text index over chat messages and notebooks.
+
+    Every chat and notebook is a row of documents, holding its title, which
+    is indexed once in titles. Chat messages are indexed one passage per
+    message as they are saved and notebooks one passage each, replaced on
+    every save; passage_refs maps passages back to their document, so
+    renames and deletes touch only that document's rows. Queries rank each
+    document by its best title or passage match with bm25 and return a
+    highlighted snippet of the best passage.
+    If the SQLite build lacks FTS5 the index disables itself and search
+    returns no hits.
+    """
+
+    def __init__(self, db_path=SEARCH_DB):
+        self.db_path = db_path
+        self.local = threading.local()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        try:
+            self.migrate()
+            self.enabled = True
+        except sqlite3.OperationalError as e:
+            logger.warning("Full-text search unavailable: %s", e)
+            self.enabled = False
+
+    def connect(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def migrate(self):
+        conn = self.connect()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            with conn:
+                for table in TABLES:
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.executescript(SCHEMA)
+
+    def is_backfilled(self, kind):
+        if not self.enabled:
+            return True
+        row = self.connect().execute(
+            "SELECT value FROM meta WHERE key = ?", (f"backfilled:{kind}",)
+        ).fetchone()
+        return row is not None
+
+    def mark_backfilled(self, kind):
+        conn = self.connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, '1')", (f"backfilled:{kind}",)
+            )
+
+    def document(self, conn, kind, doc_id, title):
+        """The row id of a document, created or retitled as needed."""
+        row = conn.execute(
+            "SELECT id, title FROM documents WHERE kind = ? AND doc_id = ?", (kind, doc_id)
+        ).fetchone()
+        if row is None:
+            cursor = conn.execute(
+                "INSERT INTO documents (kind, doc_id, title) VALUES (?, ?, ?)", (kind, doc_id, title)
+            )
+            conn.execute("INSERT INTO titles (rowid, title) VALUES (?, ?)", (cursor.lastrowid, title))
+            return cursor.lastrowid
+        if row['title'] != title:
+            self.retitle(conn, row['id'], title)
+        return row['id']
+
+    def retitle(self, conn, document, title):
+        conn.execute("UPDATE documents SET title = ? WHERE id = ?", (title, document))
+        conn.execute("DELETE FROM titles WHERE rowid = ?", (document,))
+        conn.execute("INSERT INTO titles (rowid, title) VALUES (?, ?)", (document, title))
+
+    def add_passages(self, conn, document, passages):
+        for ref, body in passages:
+            cursor = conn.execute(
+                "INSERT INTO passage_refs (document, ref) VALUES (?, ?)", (document, ref)
+            )
+            conn.execute("INSERT INTO passages (rowid, body) VALUES (?, ?)", (cursor.lastrowid, body))
+
+    def delete_passages(self, conn, document):
+        conn.execute(
+            "DELETE FROM passages WHERE rowid IN (SELECT passage FROM passage_refs WHERE document = ?)",
+            (document,),
+        )
+        conn.execute("DELETE FROM passage_refs WHERE document = ?", (document,))
+
+    def add_chat_messages(self, session_id, title, messages, first_seq):
+        if not self.enabled or not messages:
+            return
+        conn = self.connect()
+        with conn:
+            document = self.document(conn, "chat", session_id, title)
+            self.add_passages(
+                conn, document, [(first_seq + i, message['text']) for i, message in enumerate(messages)]
+            )
+
+    def set_chat_title(self, session_id, title):
+        if not self.enabled:
+            return
+        conn = self.connect()
+        with conn:
+            row = conn.execute(
+                "SELECT id FROM documents WHERE kind = 'chat' AND doc_id = ?", (session_id,)
+            ).fetchone()
+            if row:
+                self.retitle(conn, row['id'], title)
+
+    def delete_chat(self, session_id):
+        self.delete_documents("chat", session_id)
+
+    def put_notebook(self, session_id, title, content):
+        if not self.enabled:
+            return
+        conn = self.connect()
+        with conn:
+            document = self.document(conn, "notebook", session_id, title)
+            self.delete_passages(conn, document)
+            self.add_passages(conn, document, [(0, content)])
+
+    def delete_notebook(self, session_id):
+        self.delete_documents("notebook", session_id)
+
+    def delete_documents(self, kind, doc_id):
+        if not self.enabled:
+            return
+        conn = self.connect()
+        with conn:
+            row = conn.execute(
+                "SELECT id FROM documents WHERE kind = ? AND doc_id = ?", (kind, doc_id)
+            ).fetchone()
+            if row is None:
+                return
+            self.delete_passages(conn, row['id'])
+            conn.execute("DELETE FROM titles WHERE rowid = ?", (row['id'],))
+            conn.execute("DELETE FROM documents WHERE id = ?", (row['id'],))
+
+    def search(self, text, kind=None, limit=50):
+        """Best hit per document, ranked, as dicts with id, title, snippet, ref.
+
+        A document that matches only by title has no snippet and a ref of None.
+        """
+        query = to_match_query(text)
+        if not self.enabled or not query:
+            return []
+        conn = self.connect()
+        rows = conn.execute(
+            SEARCH_SQL, {'query': query, 'title_weight': TITLE_WEIGHT, 'kind': kind, 'limit': limit}
+        ).fetchall()
+        passages = [row['passage'] for row in rows if row['passage'] is not None]
+        snippets = {}
+        if passages:
+            sql = f"""
+                SELECT rowid, snippet(passages, 0, '«', '»', '…', 12) AS snippet
+                FROM passages
+                WHERE passages MATCH ? AND rowid IN ({", ".join("?" * len(passages))})
+            """
+            snippets = {row['rowid']: row['snippet'] for row in conn.execute(sql, [query, *passages])}
+        return [
+            {
+                'kind': row['kind'],
+                'id': row['doc_id'],
+                'ref': row['ref'],
+                'title': row['title'],
+                'snippet': snippets.get(row['passage'], ""),
+            }
+            for row in rows
+        ]
+
+_index = None
+
+
+def get_search_index():
+    """The process-wide index shared by the chat and notebook views."""
+    global _index
+    if _index is None:
+        _index = SearchIndex()
+    return _index
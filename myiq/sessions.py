@@ -0,0 +1,181 @@
+# myiq/sessions.py
+import os
+import threading
+from datetime import datetime
+
+from .chat_store import ChatStore
+from .persistence import get_writer
+from .search_index import get_search_index
+
+
+MESSAGE_PAGE_SIZE = 50
+
+
+class ChatSession:
+    def __init__(self, session_id=None, title="New Chat"):
+        self.session_id = session_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.title = title
+        # Only the most recent page of messages is loaded; older pages are
+        # fetched on demand through `loader(session_id, start, end)`
+        self.messages = []
+        self.first_loaded = 0
+        self.message_count = 0
+        self.loader = None
+        self.created_at = datetime.now()
+        self.updated_at = datetime.now()
+        # Number of messages already written to the history store
+        self.persisted_count = 0
+        # Rolling summary of every message with seq < summary_upto
+        self.summary = ""
+        self.summary_upto = 0
+
+    def add_message(self, text, is_user=False, attachments=None):
+        message = {
+            'text': text,
+            'is_user': is_user,
+            'timestamp': datetime.now().isoformat(),
+            'attachments': attachments or []
+        }
+        self.messages.append(message)
+        self.message_count += 1
+        self.updated_at = datetime.now()
+
+    def unsaved_messages(self):
+        return self.messages[self.persisted_count - self.first_loaded:]
+
+    def has_older(self):
+        return self.first_loaded > 0
+
+    def load_older(self, page_size=MESSAGE_PAGE_SIZE):
+        if not self.has_older() or self.loader is None:
+            return []
+        start = max(0, self.first_loaded - page_size)
+        older = self.loader(self.session_id, start, self.first_loaded)
+        self.messages[:0] = older
+        self.first_loaded = start
+        return older
+
+    def to_dict(self):
+        return {
+            'session_id': self.session_id,
+            'title': self.title,
+            'messages': self.messages,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        session = cls(data['session_id'], data['title'])
+        session.messages = data['messages']
+        session.message_count = data.get('message_count', len(session.messages))
+        session.first_loaded = session.message_count - len(session.messages)
+        session.persisted_count = session.message_count
+        session.summary = data.get('summary', "")
+        session.summary_upto = data.get('summary_upto', 0)
+        session.created_at = datetime.fromisoformat(data['created_at'])
+        session.updated_at = datetime.fromisoformat(data['updated_at'])
+        return session
+
+
+class ChatHistoryManager:
+    def __init__(self, data_dir="chat_history"):
+        self.data_dir = data_dir
+        os.makedirs(data_dir, exist_ok=True)
+        self.store = ChatStore(os.path.join(data_dir, "history.db"))
+        # Sessions saved by older versions are imported once
+        self.store.import_legacy(os.path.join(data_dir, "sessions.json"))
+        self.search_index = get_search_index()
+        if not self.search_index.is_backfilled("chat"):
+            self.backfill_search_index()
+        # Saves are written behind by the shared writer thread; until then the
+        # messages not yet written are merged here per session
+        self.writer = get_writer()
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+
+    def backfill_search_index(self):
+        for row in self.store.list_sessions():
+            messages = self.store.load_messages(row['session_id'])
+            self.search_index.add_chat_messages(row['session_id'], row['title'], messages, 0)
+        self.search_index.mark_backfilled("chat")
+
+    def save_session(self, session):
+        new_messages = list(session.unsaved_messages())
+        with self.pending_lock:
+            pending = self.pending.setdefault(
+                session.session_id, {'messages': [], 'first_seq': session.persisted_count}
+            )
+            pending['messages'].extend(new_messages)
+            pending.update(
+                title=session.title,
+                created_at=session.created_at.isoformat(),
+                updated_at=session.updated_at.isoformat(),
+                summary=session.summary,
+                summary_upto=session.summary_upto,
+            )
+        session.persisted_count = session.message_count
+        self.writer.schedule(("chat", session.session_id), lambda: self.write_session(session.session_id))
+
+    def write_session(self, session_id):
+        with self.pending_lock:
+            pending = self.pending.pop(session_id, None)
+        if pending is None:
+            return
+        self.store.save_session(
+            session_id,
+            pending['title'],
+            pending['created_at'],
+            pending['updated_at'],
+            pending['messages'],
+            pending['first_seq'],
+            pending['summary'],
+            pending['summary_upto'],
+        )
+        self.search_index.add_chat_messages(
+            session_id, pending['title'], pending['messages'], pending['first_seq']
+        )
+
+    def flush(self, session_id=None):
+        """Write pending saves now: one session's, or everything queued."""
+        self.writer.flush(None if session_id is None else [("chat", session_id)])
+
+    def load_session(self, session_id, page_size=MESSAGE_PAGE_SIZE):
+        self.flush(session_id)
+        data = self.store.get_session(session_id)
+        if not data:
+            return None
+        count = data['message_count']
+        data['messages'] = self.store.load_messages(session_id, max(0, count - page_size), count)
+        session = ChatSession.from_dict(data)
+        session.loader = self.store.load_messages
+        return session
+
+    def rename_session(self, session_id, title):
+        self.flush(session_id)
+        self.store.rename_session(session_id, title)
+        self.search_index.set_chat_title(session_id, title)
+
+    def delete_session(self, session_id):
+        self.writer.cancel(("chat", session_id))
+        with self.pending_lock:
+            self.pending.pop(session_id, None)
+        self.store.delete_session(session_id)
+        self.search_index.delete_chat(session_id)
+
+    def search(self, text):
+        self.flush()
+        return self.search_index.search(text, kind="chat")
+
+    def get_session_list(self):
+        self.flush()
+        # Sorted by updated_at descending
+        return [
+            {
+                'id': row['session_id'],
+                'title': row['title'],
+                'updated_at': row['updated_at'],
+                'message_count': row['message_count']
+            }
+            for row in self.store.list_sessions()
+        ]
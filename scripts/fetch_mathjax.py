@@ -0,0 +1,80 @@
+# scripts/fetch_mathjax.py
+"""Install MathJax into app/assets/mathjax so notebooks render offline.
+
+Downloads the MathJax npm package (or reads a tarball already on disk, for
+machines without network access) and unpacks its es5 build.
+
+    python scripts/fetch_mathjax.py
+    python scripts/fetch_mathjax.py --tarball mathjax-3.2.2.tgz
+"""
+import argparse
+import io
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+
+from mathjax_assets import ASSETS_DIR, MATHJAX_SCRIPT, MATHJAX_VERSION
+
+PACKAGE_URL = "https://registry.npmjs.org/mathjax/-/mathjax-{version}.tgz"
+BUILD_PREFIX = "package/es5/"
+
+
+def download(version):
+    url = PACKAGE_URL.format(version=version)
+    print(f"downloading {url}")
+    with urllib.request.urlopen(url, timeout=120) as response:
+        return response.read()
+
+
+def unpack(data, target):
+    """Extract the es5 build into target, replacing it only once complete."""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".mathjax-", dir=os.path.dirname(target))
+    try:
+        count = 0
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as archive:
+            for member in archive.getmembers():
+                if not member.isfile() or not member.name.startswith(BUILD_PREFIX):
+                    continue
+                dest = os.path.normpath(os.path.join(staging, member.name[len(BUILD_PREFIX):]))
+                if not dest.startswith(staging + os.sep):
+                    raise ValueError(f"unsafe path in archive: {member.name}")
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                with archive.extractfile(member) as src, open(dest, "wb") as out:
+                    shutil.copyfileobj(src, out)
+                count += 1
+        if not os.path.isfile(os.path.join(staging, os.path.basename(MATHJAX_SCRIPT))):
+            raise ValueError("archive has no es5 build of MathJax")
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        os.replace(staging, target)
+        return count
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--version", default=MATHJAX_VERSION)
+    parser.add_argument("--tarball", help="use this npm package file instead of downloading")
+    args = parser.parse_args()
+
+    if args.tarball:
+        with open(args.tarball, "rb") as f:
+            data = f.read()
+    else:
+        data = download(args.version)
+    target = os.path.join(ASSETS_DIR, os.path.dirname(MATHJAX_SCRIPT))
+    count = unpack(data, target)
+    print(f"installed {count} files in {target}")
+
+
+if __name__ == "__main__":
+    main()
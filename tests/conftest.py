@@ -0,0 +1,21 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The core package, and the app's flat modules as the app itself imports them
+sys.path[:0] = [ROOT, os.path.join(ROOT, "app")]
+
+from fake_ollama import FakeOllama  # noqa: E402
+from myiq.chat_handler import client  # noqa: E402
+
+
+@pytest.fixture
+def ollama(monkeypatch):
+    """A fake Ollama server that the shared client talks to."""
+    server = FakeOllama().start()
+    monkeypatch.setattr(client, "base_url", server.url)
+    yield server
+    server.stop()
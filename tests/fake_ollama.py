@@ -0,0 +1,71 @@
+# tests/fake_ollama.py
+"""A local stand-in for the Ollama HTTP API.
+
+Streams /api/chat replies as NDJSON, one chunk per `delay` seconds, from
+the chunks a test sets. Requests are recorded, and a client that hangs up
+mid-stream is noticed through the failed write.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def chat_chunks(pieces):
+    """The /api/chat stream Ollama sends for a reply made of pieces."""
+    chunks = [{"message": {"role": "assistant", "content": piece}, "done": False} for piece in pieces]
+    chunks.append({"message": {"role": "assistant", "content": ""}, "done": True})
+    return chunks
+
+
+class FakeOllama:
+    def __init__(self):
+        self.chunks = chat_chunks(["Hello", " there", "!"])
+        self.delay = 0.0
+        self.requests = []
+        self.disconnected = threading.Event()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                fake.requests.append((self.path, payload))
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for chunk in fake.chunks:
+                        line = json.dumps(chunk).encode() + b"\n"
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                        self.wfile.flush()
+                        time.sleep(fake.delay)
+                    self.wfile.write(b"0\r\n\r\n")
+                except OSError:
+                    fake.disconnected.set()
+                    self.close_connection = True
+
+        return Handler
@@ -0,0 +1,84 @@
+# tests/test_chat_app.py
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+
+from myiq import search_index  # noqa: E402
+from myiq.sessions import ChatSession  # noqa: E402
+
+
+@pytest.fixture
+def qapp():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+@pytest.fixture
+def window(qapp, ollama, tmp_path, monkeypatch):
+    """The chat window, with its history and search index in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(search_index, "_index", None)
+    from chat_app import MyIQWindow
+    window = MyIQWindow()
+    yield window
+    window.close()
+    window.deleteLater()
+    qapp.processEvents()
+
+
+def saved_session(manager, count, session_id=None):
+    session = ChatSession(session_id)
+    for n in range(count):
+        session.add_message(f"message {n}", is_user=n % 2 == 0)
+    manager.save_session(session)
+    manager.flush()
+    return manager.load_session(session.session_id)
+
+
+def test_streaming_bubble_follows_prepended_messages(window):
+    window.current_session = saved_session(window.history_manager, 60)
+    window.load_chat_history()
+    model = window.chat_model
+    assert len(model.messages) == 50
+
+    window.update_stream_bubble("streamed answer")
+    window.load_older_messages()
+    window.update_stream_bubble("streamed answer more")
+
+    texts = [m['text'] for m in model.messages]
+    assert len(texts) == 61
+    assert texts[:60] == [f"message {n}" for n in range(60)]
+    assert texts[60] == "streamed answer more"
+
+
+def wait_for(qapp, condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        qapp.processEvents()
+        time.sleep(0.01)
+
+
+def test_rename_while_reply_is_in_flight(qapp, window, ollama, monkeypatch):
+    # Ids are timestamps, keep it apart from the chat opened below
+    session = saved_session(window.history_manager, 2, "20240101_000000")
+    window.load_session_list()
+    window.load_selected_session(window.session_items[session.session_id])
+    ollama.delay = 0.05
+    window.input_box.setPlainText("question")
+    window.send_message()
+    assert session.session_id in window.replies
+
+    # Open another chat, then rename the first from the sidebar
+    window.create_new_session()
+    monkeypatch.setattr(QtWidgets.QInputDialog, "getText", lambda *args, **kwargs: ("Renamed", True))
+    window.rename_session(window.session_items[session.session_id])
+    wait_for(qapp, lambda: session.session_id not in window.replies)
+
+    window.history_manager.flush()
+    titles = {s['id']: s['title'] for s in window.history_manager.get_session_list()}
+    assert titles[session.session_id] == "Renamed"
+    assert window.session_items[session.session_id].text(0) == "Renamed"
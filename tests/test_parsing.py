@@ -0,0 +1,47 @@
+# tests/test_parsing.py
+from myiq import assistant
+from myiq.file_parser import is_parse_error, parse_file
+from myiq.parse_cache import ParseCache
+
+
+def test_documents_starting_with_a_bracket_are_not_errors(tmp_path):
+    path = tmp_path / "settings.txt"
+    path.write_text("[section]\nkey=value\n")
+
+    text = parse_file(str(path))
+    assert text.startswith("[section]")
+    assert not is_parse_error(text)
+
+
+def test_failures_are_errors(tmp_path):
+    unsupported = tmp_path / "data.xyz"
+    unsupported.write_text("anything")
+
+    assert is_parse_error(parse_file(str(unsupported)))
+    assert is_parse_error(parse_file(str(tmp_path / "missing.txt")))
+
+
+def test_only_parsed_text_is_cached(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"))
+    document = tmp_path / "list.txt"
+    document.write_text("[1, 2, 3]")
+    unsupported = tmp_path / "data.xyz"
+    unsupported.write_text("anything")
+
+    key, _ = cache.parse(str(document))
+    assert cache.get(key) == "[1, 2, 3]"
+    key, _ = cache.parse(str(unsupported))
+    assert cache.get(key) is None
+
+
+def test_bracketed_attachment_is_indexed(monkeypatch):
+    indexed = []
+
+    class Retriever:
+        def index_in_background(self, doc_id, text, name=None):
+            indexed.append(doc_id)
+
+    monkeypatch.setattr("myiq.retrieval.get_retriever", Retriever)
+    assert assistant.index_attachment("key", "[link](https://example.com)")
+    assert not assistant.index_attachment("other", "[Unsupported file type]")
+    assert indexed == ["key"]
@@ -0,0 +1,102 @@
+# tests/test_streaming.py
+import threading
+import time
+
+import pytest
+
+from fake_ollama import chat_chunks
+from myiq.chat_handler import client
+from myiq.scheduler import BACKGROUND, INTERACTIVE, LLMScheduler
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def test_stream_chat_yields_pieces(ollama):
+    ollama.chunks = chat_chunks(["The", " answer", " is", " 42."])
+
+    assert list(client.stream_chat(MESSAGES)) == ["The", " answer", " is", " 42."]
+    path, payload = ollama.requests[-1]
+    assert path == "/api/chat"
+    assert payload["stream"] is True
+    assert payload["messages"] == MESSAGES
+
+
+def test_stream_chat_stops_at_done(ollama):
+    ollama.chunks = chat_chunks(["one"]) + chat_chunks(["ignored"])
+
+    assert list(client.stream_chat(MESSAGES)) == ["one"]
+
+
+def test_error_chunk_raises(ollama):
+    ollama.chunks = chat_chunks(["partial"])[:1] + [{"error": "model 'x' not found"}]
+
+    pieces = []
+    with pytest.raises(RuntimeError, match="not found"):
+        for piece in client.stream_chat(MESSAGES):
+            pieces.append(piece)
+    assert pieces == ["partial"]
+
+
+def test_abort_ends_a_blocked_read(ollama):
+    ollama.chunks = chat_chunks(["word"] * 100)
+    ollama.delay = 0.05
+    opened = []
+
+    def abort_soon(response):
+        opened.append(response)
+        threading.Timer(0.12, client.abort, [response]).start()
+
+    started = time.monotonic()
+    pieces = []
+    with pytest.raises(Exception):
+        for piece in client.stream_chat(MESSAGES, on_open=abort_soon):
+            pieces.append(piece)
+    assert time.monotonic() - started < 1.0
+    assert 0 < len(pieces) < 100
+    assert ollama.disconnected.wait(2)
+
+
+def test_cancel_mid_stream(ollama):
+    ollama.chunks = chat_chunks(["word"] * 100)
+    ollama.delay = 0.02
+    scheduler = LLMScheduler(workers=1)
+    done = threading.Event()
+
+    def cancel_after_three(request, piece):
+        if len(request.pieces) == 3:
+            request.cancel()
+
+    request = scheduler.submit(
+        lambda request: request.stream_chat(MESSAGES),
+        on_chunk=cancel_after_three,
+        on_done=lambda request: done.set(),
+    )
+    try:
+        assert done.wait(2)
+        assert request.is_cancelled()
+        assert request.result is None
+        assert request.error is None
+        assert request.pieces == ["word"] * 3
+        assert ollama.disconnected.wait(2)
+    finally:
+        scheduler.close()
+
+
+def test_interactive_requests_run_before_background(ollama):
+    scheduler = LLMScheduler(workers=1)
+    release = threading.Event()
+    order = []
+    try:
+        blocker = scheduler.submit(lambda request: release.wait(2))
+        background = scheduler.submit(lambda request: order.append("background"), priority=BACKGROUND)
+        interactive = scheduler.submit(
+            lambda request: order.append("interactive") or request.stream_chat(MESSAGES),
+            priority=INTERACTIVE,
+        )
+        release.set()
+        for request in (blocker, background, interactive):
+            assert request.wait(2)
+        assert order == ["interactive", "background"]
+        assert interactive.result == "Hello there!"
+    finally:
+        scheduler.close()